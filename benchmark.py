@@ -0,0 +1,230 @@
+# Benchmark suite: synthetic traffic_stops data, then timings for cleaning, canned queries, metrics and predictions
+#
+# Usage:
+#   python benchmark.py --rows 10000 1000000 10000000 --output bench_results.json
+#   python benchmark.py --rows 10000 --backend duckdb                 # in-memory DuckDB stand-in (needs duckdb)
+#   python benchmark.py --rows 1000000 --with-indexes --compare bench_results.json
+#
+# PostgreSQL runs use their own schema (securecheck_bench) through search_path, so the canned queries hit the
+# benchmark table and never the real traffic_stops table.
+import argparse
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+from config import DB_URL
+from cleaning import TABLE_COLUMNS, clean_data
+from queries import medium_query_map, advanced_query_map
+from rollups import ROLLUP_SQL, rollup_from_sql_result, rollup_metrics
+from prediction import build_prediction_index, predict_outcome, PREDICTION_KEYS
+from migrations import TRAFFIC_STOPS_COLUMNS_SQL, TRAFFIC_STOPS_INDEXES
+from columnar import run_snapshot_query
+from fetch import fetch_arrow_frame
+
+try: # DuckDB stand-in is optional
+    import duckdb
+except ImportError:
+    duckdb = None
+
+BENCH_SCHEMA = "securecheck_bench"
+GENERATE_CHUNK_ROWS = 500000 # Rows generated and loaded at a time (bounds memory)
+
+# Value sets and weights for the synthetic data (README schema)
+COUNTRIES = (['USA', 'India', 'Canada'], [0.45, 0.35, 0.20])
+VIOLATIONS = (['Speeding', 'Other', 'DUI', 'Seatbelt', 'Signal'], [0.55, 0.15, 0.10, 0.10, 0.10])
+RACES = (['White', 'Black', 'Asian', 'Hispanic', 'Other'], [0.55, 0.15, 0.12, 0.13, 0.05])
+DURATIONS = (['0-5 Min', '6-15 Min', '16-30 Min', '30+ Min'], [0.35, 0.40, 0.18, 0.07])
+OUTCOMES = (['Warning', 'Ticket', 'Arrest'], [0.55, 0.38, 0.07])
+SEARCH_TYPES = ['Vehicle Search', 'Frisk']
+NULL_RATE = 0.01 # Share of missing values in nullable columns
+
+# Generate n synthetic stops in chunks of at most GENERATE_CHUNK_ROWS rows (same seed gives the same data)
+def generate_stops(n, seed=42):
+    rng = np.random.default_rng(seed)
+    vehicles = np.array([f"TN{i:07d}" for i in range(max(n // 3, 1))]) # Pool smaller than n so vehicles repeat
+    vehicle_weights = 1.0 / np.arange(1, len(vehicles) + 1) ** 0.8 # A few repeat offenders, a long tail of one-off vehicles
+    vehicle_weights /= vehicle_weights.sum()
+    for start in range(0, n, GENERATE_CHUNK_ROWS):
+        size = min(GENERATE_CHUNK_ROWS, n - start)
+        choice = lambda values: rng.choice(values[0], size=size, p=values[1])
+        outcome = choice(OUTCOMES)
+        searched = rng.random(size) < 0.30
+        chunk = pd.DataFrame({
+            'stop_date': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 5 * 365, size), unit='D'),
+            'stop_time': pd.to_timedelta(rng.integers(0, 24 * 3600, size), unit='s'),
+            'country_name': choice(COUNTRIES),
+            'driver_gender': rng.choice(['M', 'F'], size=size, p=[0.68, 0.32]),
+            'driver_age': np.clip(rng.normal(38, 13, size).round(), 16, 90).astype('int16'),
+            'driver_race': choice(RACES),
+            'violation': choice(VIOLATIONS),
+            'stop_outcome': outcome,
+            'search_conducted': searched,
+            'search_type': np.where(searched, rng.choice(SEARCH_TYPES, size=size), None),
+            'is_arrested': (outcome == 'Arrest') | (rng.random(size) < 0.01),
+            'drugs_related_stop': rng.random(size) < np.where(searched, 0.25, 0.02),
+            'stop_duration': choice(DURATIONS),
+            'vehicle_number': vehicles[rng.choice(len(vehicles), size=size, p=vehicle_weights)],
+        })
+        chunk['stop_date'] = chunk['stop_date'].dt.date
+        chunk['stop_time'] = chunk['stop_time'].astype('string').str[-8:] # 'HH:MM:SS'
+        for col in ['country_name', 'driver_age', 'driver_race', 'violation', 'stop_duration']: # Some missing values for clean_data to fill
+            chunk[col] = chunk[col].astype('Int16' if col == 'driver_age' else object).where(rng.random(size) >= NULL_RATE)
+        yield chunk[TABLE_COLUMNS]
+
+# Create the benchmark table in its own schema and COPY the synthetic rows into it
+def load_postgres(db_url, n, seed, with_indexes):
+    engine = create_engine(db_url, connect_args={"options": f"-csearch_path={BENCH_SCHEMA}"})
+    with engine.begin() as conn:
+        conn.execute(text(f"create schema if not exists {BENCH_SCHEMA}"))
+        conn.execute(text(f"drop table if exists {BENCH_SCHEMA}.traffic_stops"))
+        conn.execute(text(f"create table {BENCH_SCHEMA}.traffic_stops (\n{TRAFFIC_STOPS_COLUMNS_SQL}\n)"))
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        for chunk in generate_stops(n, seed):
+            buffer = io.StringIO()
+            chunk.to_csv(buffer, index=False, header=False, na_rep='')
+            buffer.seek(0)
+            cursor.copy_expert(f"copy traffic_stops ({', '.join(TABLE_COLUMNS)}) from stdin with (format csv, null '')", buffer)
+        raw.commit()
+    finally:
+        raw.close()
+    with engine.begin() as conn:
+        for statement in (TRAFFIC_STOPS_INDEXES if with_indexes else []):
+            conn.execute(text(statement))
+        conn.execute(text("analyze traffic_stops"))
+    return engine
+
+# Load the synthetic rows into an in-memory DuckDB database
+def load_duckdb(n, seed):
+    if duckdb is None:
+        raise SystemExit("❌ The DuckDB stand-in needs duckdb: pip install duckdb")
+    conn = duckdb.connect()
+    conn.execute(f"create table traffic_stops ({TRAFFIC_STOPS_COLUMNS_SQL.replace('text', 'varchar')})")
+    for chunk in generate_stops(n, seed):
+        conn.register("chunk", chunk)
+        conn.execute(f"insert into traffic_stops select cast(stop_date as date), cast(stop_time as time), "
+                     f"{', '.join(TABLE_COLUMNS[2:])} from chunk")
+        conn.unregister("chunk")
+    return conn
+
+# Run fn repeat times; returns timing stats in milliseconds and the last result
+def time_call(fn, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return {"ms_min": round(min(times), 3), "ms_median": round(statistics.median(times), 3)}, result
+
+# Time one named step, recording errors instead of stopping the run
+def measure(results, rows, category, name, fn, repeat):
+    try:
+        stats, result = time_call(fn, repeat)
+        entry = dict(stats, result_rows=len(result) if hasattr(result, '__len__') else None, error=None)
+    except Exception as e:
+        result, entry = None, {"ms_min": None, "ms_median": None, "result_rows": None, "error": str(e).splitlines()[0]}
+    results.append(dict(entry, rows=rows, category=category, name=name))
+    status = f"{entry['ms_median']:>10.1f} ms" if entry["error"] is None else f"  ERROR: {entry['error']}"
+    print(f"{rows:>10,} {category:<11} {name[:70]:<70} {status}")
+    return result
+
+def run_size(args, n, results):
+    if args.backend == "duckdb":
+        conn = load_duckdb(n, args.seed)
+        read = lambda sql: run_snapshot_query(conn, sql) # Same PostgreSQL-to-DuckDB translation as the dashboard
+    else:
+        engine = load_postgres(args.db_url, n, args.seed, args.with_indexes)
+        def read(sql):
+            with engine.connect() as conn:
+                return pd.read_sql(text(sql), conn)
+
+    if args.backend == "postgres": # Arrow fetch path (COPY into Arrow-backed columns), with bytes and decode time
+        stats = {}
+        def read_arrow():
+            with engine.connect() as conn:
+                return fetch_arrow_frame(conn, "SELECT * FROM traffic_stops", None, stats)
+        arrow_raw = measure(results, n, "load", "SELECT * FROM traffic_stops (arrow)", read_arrow, 1)
+        results[-1].update({"bytes": stats.get("bytes"), "decode_ms": stats.get("decode_ms")})
+        if arrow_raw is not None:
+            measure(results, n, "clean", "clean_data (arrow)", lambda: clean_data(arrow_raw.copy()), args.repeat)
+    raw = measure(results, n, "load", "SELECT * FROM traffic_stops", lambda: read("SELECT * FROM traffic_stops"), 1)
+    data = measure(results, n, "clean", "clean_data", lambda: clean_data(raw.copy()), args.repeat) if raw is not None else None
+
+    for label, sql in list(medium_query_map.items()) + list(advanced_query_map.items()):
+        measure(results, n, "query", label, lambda: read(sql), args.repeat)
+
+    # Key metrics: old full-frame computation vs the rollup
+    if data is not None:
+        measure(results, n, "metrics", "metrics from full frame", lambda: [
+            data.shape[0], data['stop_outcome'].value_counts().get('Arrest', 0), data['search_conducted'].sum(), data['violation'].nunique()], args.repeat)
+    rollup = measure(results, n, "metrics", "rollup build (one GROUP BY)", lambda: rollup_from_sql_result(read(ROLLUP_SQL)), 1)
+    if rollup is not None:
+        measure(results, n, "metrics", "metrics from rollup", lambda: rollup_metrics(rollup), args.repeat)
+
+    # Prediction: old boolean mask scan vs the lookup index
+    if data is not None:
+        rng = np.random.default_rng(args.seed)
+        sample = data[PREDICTION_KEYS].iloc[rng.integers(0, len(data), 1000)].itertuples(index=False)
+        lookups = [tuple(row) for row in sample]
+        first = lookups[0]
+        measure(results, n, "prediction", "mask scan (one prediction)", lambda: data[
+            (data['driver_gender'] == first[0]) & (data['driver_age'] == first[1]) & (data['search_conducted'] == first[2]) &
+            (data['stop_duration'] == first[3]) & (data['drugs_related_stop'] == first[4])]['stop_outcome'].mode(), args.repeat)
+        index = measure(results, n, "prediction", "index build", lambda: build_prediction_index(data), 1)
+        if index is not None:
+            measure(results, n, "prediction", "index lookup x1000", lambda: [predict_outcome(index, *key) for key in lookups], args.repeat)
+
+# Print steps that got slower than the previous results file by more than the threshold
+def compare(previous_path, results, threshold=1.2):
+    with open(previous_path) as f:
+        previous = {(r["rows"], r["name"]): r for r in json.load(f)["results"]}
+    print("\n📉 Changes against", previous_path)
+    for r in results:
+        old = previous.get((r["rows"], r["name"]))
+        if old and old["ms_median"] and r["ms_median"]:
+            ratio = r["ms_median"] / old["ms_median"]
+            if ratio > threshold or ratio < 1 / threshold:
+                print(f"{'🔺 slower' if ratio > 1 else '🔻 faster'} x{ratio:.2f} {r['rows']:>10,} {r['name'][:70]}")
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SecureCheck benchmark on synthetic traffic_stops data")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 1000000, 10000000], help="Table sizes to benchmark")
+    parser.add_argument("--backend", choices=["postgres", "duckdb"], default="postgres")
+    parser.add_argument("--db-url", default=DB_URL, help="PostgreSQL URL (tables go in the securecheck_bench schema)")
+    parser.add_argument("--with-indexes", action="store_true", help="Create the migration indexes before timing")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per timed step (median and min are reported)")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n in args.rows:
+        run_size(args, n, results)
+    report = {
+        "meta": {"commit": git_commit(), "backend": args.backend, "seed": args.seed, "repeat": args.repeat,
+                 "with_indexes": args.with_indexes, "python": platform.python_version(), "pandas": pd.__version__,
+                 "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+    if args.compare:
+        compare(args.compare, results)
+
+if __name__ == "__main__":
+    sys.exit(main())
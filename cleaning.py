@@ -0,0 +1,100 @@
+# Normalization rules for traffic_stops data, shared by the dashboard and the ingestion command
+import pandas as pd
+
+# Columns of traffic_stops (see README schema)
+TABLE_COLUMNS = ['stop_date', 'stop_time', 'country_name', 'driver_gender', 'driver_age', 'driver_race',
+                 'violation', 'stop_outcome', 'search_conducted', 'search_type', 'is_arrested',
+                 'drugs_related_stop', 'stop_duration', 'vehicle_number']
+
+# Low-cardinality text columns: missing values become 'Unknown', stored as pandas categories in the dashboard
+CATEGORY_COLS = ['driver_gender', 'driver_race', 'country_name', 'violation', 'stop_outcome', 'search_type', 'stop_duration']
+# Flag columns: missing values become False
+BOOL_COLS = ['search_conducted', 'drugs_related_stop', 'is_arrested']
+
+# Text spellings of True found in CSV exports
+TRUE_VALUES = ['true', 't', '1', 'yes', 'y']
+
+# Coerce a flag column (bools, NULLs or text like 'True'/'yes'/'1') to plain bool, missing as False
+def to_bool(series):
+    if pd.api.types.is_bool_dtype(series):
+        return series.fillna(False).astype(bool) # Nullable (Arrow) booleans can hold NULL
+    return series.astype('string').str.strip().str.lower().isin(TRUE_VALUES).astype(bool)
+
+# Time of day as seconds since midnight (nullable Int32) from time objects, 'HH:MM[:SS]' text or full timestamps
+def time_of_day_seconds(series):
+    arrow_type = getattr(series.dtype, 'pyarrow_dtype', None)
+    if arrow_type is not None and str(arrow_type).startswith('time'): # Arrow time columns from the fetch layer: integer maths only
+        per_second = {'s': 1, 'ms': 10 ** 3, 'us': 10 ** 6, 'ns': 10 ** 9}[arrow_type.unit]
+        return (series.astype('int64[pyarrow]') // per_second).astype('Int32')
+    text_times = series.astype('string')
+    seconds = pd.to_timedelta(text_times, errors='coerce').dt.total_seconds() # Fast path for 'HH:MM:SS' values
+    leftover = seconds.isna() & text_times.notna()
+    if leftover.any(): # Full timestamps or 'HH:MM': keep only the time of day
+        stamps = pd.to_datetime(text_times[leftover], format='mixed', errors='coerce')
+        seconds[leftover] = stamps.dt.hour * 3600 + stamps.dt.minute * 60 + stamps.dt.second
+    return seconds.astype('Int32')
+
+# Fill missing values: 'Unknown' for text, False for flags, median for age (median_age defaults to this frame's median)
+def normalize_values(df, median_age=None):
+    string_cols = [col for col in CATEGORY_COLS if col in df.columns]
+    if string_cols:
+        df[string_cols] = df[string_cols].fillna('Unknown')
+
+    for col in [col for col in BOOL_COLS if col in df.columns]:
+        df[col] = to_bool(df[col])
+
+    if 'driver_age' in df.columns:
+        df['driver_age'] = pd.to_numeric(df['driver_age'], errors='coerce')
+        median_age = df['driver_age'].median() if median_age is None else median_age
+        if pd.notna(median_age): # No ages at all: leave them missing
+            df['driver_age'] = df['driver_age'].fillna(median_age).round().astype('int16')
+    return df
+
+# Seconds since midnight back to 'HH:MM:SS' text (missing stays missing)
+def format_time_of_day(seconds):
+    seconds = pd.to_numeric(seconds, errors='coerce').astype('Int64')
+    part = lambda values: values.astype('string').str.zfill(2)
+    return part(seconds // 3600) + ':' + part(seconds % 3600 // 60) + ':' + part(seconds % 60)
+
+# Footprint of a frame with the column types of a plain (non-Arrow) fetch: text, dates and times as Python objects,
+# numbers as 8-byte values, flags as 1-byte bools. Converted one column at a time, so only one column is copied at once.
+def object_memory_bytes(df):
+    total = 0
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            total += len(series)
+        elif pd.api.types.is_numeric_dtype(series):
+            total += len(series) * 8
+        else:
+            total += int(series.astype(object).memory_usage(deep=True, index=False))
+    return total
+
+# Cleaned rows laid out like the table: every column in schema order, dates without a time, stop_time as 'HH:MM:SS'
+def display_rows(df):
+    df = df.reindex(columns=TABLE_COLUMNS) # New frame, so a cached dataset is not modified
+    df['stop_date'] = pd.to_datetime(df['stop_date'], errors='coerce').dt.date
+    df['stop_time'] = format_time_of_day(df['stop_time'])
+    return df
+
+def clean_data(df):
+    # Drop columns where all values are NaN
+    df = df.dropna(axis=1, how='all')
+
+    # Fill missing text, flag and age values
+    df = normalize_values(df)
+
+    # Store low-cardinality text columns as categories
+    string_cols = [col for col in CATEGORY_COLS if col in df.columns]
+    if string_cols:
+        df[string_cols] = df[string_cols].astype('category')
+
+    # Convert 'stop_date' to datetime
+    if 'stop_date' in df.columns:
+        df['stop_date'] = pd.to_datetime(df['stop_date'], errors='coerce')
+
+    # Convert 'stop_time' to seconds since midnight (nullable int32) instead of Python time objects
+    if 'stop_time' in df.columns:
+        df['stop_time'] = time_of_day_seconds(df['stop_time'])
+
+    return df
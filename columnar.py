@@ -0,0 +1,168 @@
+# Embedded columnar backend: canned queries on DuckDB over a Parquet snapshot of traffic_stops
+#
+# Usage:
+#   python columnar.py snapshot            # export traffic_stops to the Parquet snapshot
+#   python columnar.py verify              # run every canned query on PostgreSQL and DuckDB, compare results and timings
+#
+# The dashboard refreshes the snapshot every SNAPSHOT_REFRESH seconds in a background thread and sends the
+# queries in COLUMNAR_QUERIES to DuckDB, so scan-heavy analytics no longer compete with the log writer.
+import argparse
+import os
+import re
+import sys
+import time
+import pandas as pd
+from sqlalchemy import create_engine, text
+from config import DB_URL, SNAPSHOT_PATH
+from cleaning import TABLE_COLUMNS
+from queries import medium_query_map, advanced_query_map
+from fetch import iter_arrow_batches
+
+try: # Columnar backend is optional
+    import duckdb
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    duckdb = pa = pq = None
+
+# Snapshot column types (match the PostgreSQL table, see migrations.py)
+SNAPSHOT_SCHEMA = pa.schema([
+    ('stop_date', pa.date32()), ('stop_time', pa.time64('us')), ('country_name', pa.string()),
+    ('driver_gender', pa.string()), ('driver_age', pa.int16()), ('driver_race', pa.string()),
+    ('violation', pa.string()), ('stop_outcome', pa.string()), ('search_conducted', pa.bool_()),
+    ('search_type', pa.string()), ('is_arrested', pa.bool_()), ('drugs_related_stop', pa.bool_()),
+    ('stop_duration', pa.string()), ('vehicle_number', pa.string()),
+]) if pa is not None else None
+
+# Queries that stay on PostgreSQL: advanced 2 pairs rows by row_number() over() without an order,
+# so its output depends on the scan order of the engine that runs it
+POSTGRES_ONLY_QUERIES = {advanced_query_map["""2.Driver Violation Trends Based on Age and Race (Join with Subquery)"""]}
+# Per-query backend choice: every other canned query can run on the snapshot
+COLUMNAR_QUERIES = {query for query in list(medium_query_map.values()) + list(advanced_query_map.values()) if query not in POSTGRES_ONLY_QUERIES}
+
+def columnar_available():
+    return duckdb is not None
+
+# Stream traffic_stops into a Parquet file; written to a temporary file and renamed so readers never see half a snapshot
+def export_snapshot(engine, path=SNAPSHOT_PATH):
+    if not columnar_available():
+        raise SystemExit("❌ The columnar backend needs duckdb and pyarrow: pip install duckdb pyarrow")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    rows = 0
+    with engine.connect() as conn:
+        with pq.ParquetWriter(tmp_path, SNAPSHOT_SCHEMA, compression='zstd') as writer:
+            for batch in iter_arrow_batches(conn, f"select {', '.join(TABLE_COLUMNS)} from traffic_stops"): # COPY straight to Arrow
+                writer.write_table(pa.Table.from_batches([batch]).cast(SNAPSHOT_SCHEMA))
+                rows += batch.num_rows
+    os.replace(tmp_path, path)
+    return rows
+
+# Load a snapshot into a new in-memory DuckDB database
+def open_snapshot(path=SNAPSHOT_PATH):
+    conn = duckdb.connect()
+    conn.execute("create table traffic_stops as select * from read_parquet(?)", [path])
+    return conn
+
+# Replace the arguments of every round(expr, n) call, innermost first
+def _rewrite_round(sql):
+    out, i = [], 0
+    for match in re.finditer(r"\bround\s*\(", sql, flags=re.IGNORECASE):
+        if match.start() < i: # Nested inside a round() already rewritten
+            continue
+        depth, j, comma = 1, match.end(), None
+        while depth: # Find the matching parenthesis and the last top-level comma
+            if sql[j] == '(':
+                depth += 1
+            elif sql[j] == ')':
+                depth -= 1
+            elif sql[j] == ',' and depth == 1:
+                comma = j
+            j += 1
+        if comma is None: # round(x) without a scale is left as is
+            continue
+        expr = _rewrite_round(sql[match.end():comma])
+        out.append(sql[i:match.end()] + f"cast({expr} as decimal(38,10))" + sql[comma:j])
+        i = j
+    return "".join(out) + sql[i:]
+
+# Translate PostgreSQL-only syntax in the canned queries to DuckDB with the same output
+def translate_query(sql):
+    # round() on PostgreSQL numeric rounds half away from zero; DuckDB's double division would not, so round a decimal
+    sql = _rewrite_round(sql)
+    # to_char(date, 'month') is the lowercase month name padded to 9 characters
+    sql = re.sub(r"to_char\((\w+)\s*,\s*'month'\)", r"rpad(lower(monthname(\1)), 9, ' ')", sql, flags=re.IGNORECASE)
+    # date_trunc('hour', time) returns an interval on PostgreSQL
+    sql = re.sub(r"date_trunc\('hour'\s*,\s*(\w+)\)", r"to_hours(cast(extract(hour from \1) as bigint))", sql, flags=re.IGNORECASE)
+    return sql
+
+# Run a canned query on the snapshot; result columns are lowercased like PostgreSQL's unquoted identifiers.
+# Pass a cursor from conn.cursor() to be able to interrupt the query from another thread.
+def run_snapshot_query(conn, sql, cursor=None, params=None):
+    cursor = conn.cursor() if cursor is None else cursor # cursor() gives each thread its own connection
+    sql = translate_query(sql)
+    for name in params or {}: # :name bind parameters (see filters.py) are $name in DuckDB
+        sql = re.sub(rf"(?<!:):{name}\b", f"${name}", sql)
+    result_df = cursor.execute(sql, params or None).df()
+    result_df.columns = [col.lower() for col in result_df.columns]
+    return result_df
+
+# Compare two query results ignoring row order and int/float/decimal differences. With a limit, rows tied
+# with the last row may differ (either engine may pick any of them) as long as every numeric value matches.
+def results_match(expected, actual, limited=False):
+    if list(expected.columns) != list(actual.columns) or len(expected) != len(actual):
+        return False
+    def normalize(df):
+        df = df.copy()
+        for col in df.columns:
+            values = df[col].astype(object).where(df[col].notna(), None) # Same missing value for numpy and Arrow-backed columns
+            numbers = pd.to_numeric(values, errors='coerce')
+            if numbers.notna().sum() == values.notna().sum() and not pd.api.types.is_timedelta64_dtype(df[col]):
+                df[col] = numbers.astype('float64').round(6) # Decimal, int and float compare by value
+            else:
+                df[col] = values.astype('string')
+        return df
+    expected, actual = normalize(expected), normalize(actual)
+    if expected.sort_values(list(expected.columns), ignore_index=True).equals(actual.sort_values(list(actual.columns), ignore_index=True)):
+        return True
+    numeric = [col for col in expected.columns if expected[col].dtype == 'float64']
+    if not limited or not numeric or expected.empty:
+        return False
+    def untied(df): # Rows whose numeric values differ from the last row's
+        return df[(df[numeric] != df[numeric].iloc[-1]).any(axis=1)].sort_values(list(df.columns), ignore_index=True)
+    return (sorted(map(tuple, expected[numeric].values)) == sorted(map(tuple, actual[numeric].values))
+            and untied(expected).equals(untied(actual)))
+
+# Run every canned query on both backends; returns {label: {"match", "postgres_ms", "duckdb_ms"}}
+def verify(engine, conn):
+    report = {}
+    for label, query in list(medium_query_map.items()) + list(advanced_query_map.items()):
+        start = time.perf_counter()
+        with engine.connect() as pg_conn:
+            expected = pd.read_sql(text(query), pg_conn)
+        postgres_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        actual = run_snapshot_query(conn, query)
+        duckdb_ms = (time.perf_counter() - start) * 1000
+        limited = re.search(r"\blimit\s+\d+", query, flags=re.IGNORECASE) is not None
+        report[label] = {"match": results_match(expected, actual, limited), "columnar": query in COLUMNAR_QUERIES,
+                         "postgres_ms": round(postgres_ms, 2), "duckdb_ms": round(duckdb_ms, 2)}
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parquet snapshot and DuckDB backend for the canned queries")
+    parser.add_argument("command", choices=["snapshot", "verify"])
+    parser.add_argument("--path", default=SNAPSHOT_PATH, help="Snapshot file")
+    args = parser.parse_args(argv)
+    engine = create_engine(DB_URL)
+    start = time.perf_counter()
+    rows = export_snapshot(engine, args.path)
+    print(f"📦 Exported {rows:,} rows to {args.path} in {time.perf_counter() - start:.1f}s")
+    if args.command == "verify":
+        for label, result in verify(engine, open_snapshot(args.path)).items():
+            status = "✅ match" if result["match"] else ("⚠️ differs (stays on PostgreSQL)" if not result["columnar"] else "❌ differs")
+            speedup = result["postgres_ms"] / max(result["duckdb_ms"], 1e-9)
+            print(f"{status:<34} {result['postgres_ms']:>9.1f} ms pg {result['duckdb_ms']:>9.1f} ms duckdb (x{speedup:.1f})  {label[:60]}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# Concurrent query execution: a thread pool runs independent dashboard queries while the page renders.
+# Each query carries a handle that can cancel it on the server, and statement timeouts are set per query.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from sqlalchemy import text
+from config import QUERY_TIMEOUT_MS, QUERY_TIMEOUTS
+
+# Shared pool state: {"pool", "submitted", "finished", "cancelled", "failed", "lock"}
+def new_query_executor(workers):
+    return {"pool": ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query"), "workers": workers,
+            "submitted": 0, "finished": 0, "cancelled": 0, "failed": 0, "lock": threading.Lock()}
+
+# Cancellation handle for one query: cancel is how to stop the running statement (set while it runs)
+def new_query_handle():
+    return {"cancel": None, "cancelled": False, "error": None, "lock": threading.Lock()}
+
+def timeout_for(name): # Statement timeout in ms for a named query (0: none)
+    return int(QUERY_TIMEOUTS.get(name, QUERY_TIMEOUT_MS))
+
+# Run fn(*args, handle=handle) on the pool; returns (future, handle)
+def submit_query(executor, fn, *args):
+    handle = new_query_handle()
+    def finished(future): # Count finished queries once their result (or failure) is in
+        with executor["lock"]:
+            executor["finished"] += 1
+            executor["failed"] += handle["error"] is not None
+    with executor["lock"]:
+        executor["submitted"] += 1
+    future = executor["pool"].submit(fn, *args, handle=handle)
+    future.add_done_callback(finished)
+    return future, handle
+
+# Cancel a query: skipped if it has not started yet, otherwise the server is asked to stop it
+def cancel_query(executor, handle):
+    with handle["lock"]: # Held while cancelling so the connection cannot go back to the pool meanwhile
+        if handle["cancelled"]:
+            return
+        handle["cancelled"] = True
+        if handle["cancel"] is not None:
+            try:
+                handle["cancel"]()
+            except Exception as e:
+                print(f"Error cancelling query: {e}")
+    with executor["lock"]:
+        executor["cancelled"] += 1
+
+def is_cancelled(handle):
+    return handle is not None and handle["cancelled"]
+
+def set_query_error(handle, error): # Keep the failure (e.g. a statement timeout) for the page to show
+    if handle is not None:
+        handle["error"] = str(getattr(error, "orig", error)).strip() # The driver's message, without SQLAlchemy's SQL echo
+
+# Make cancel() stop the statement run inside the block; raises if the query was cancelled before it started
+@contextmanager
+def cancellable(handle, cancel):
+    if handle is not None:
+        with handle["lock"]:
+            if handle["cancelled"]:
+                raise RuntimeError("Query cancelled before it started")
+            handle["cancel"] = cancel
+    try:
+        yield
+    finally:
+        if handle is not None:
+            with handle["lock"]: # Detach before the connection is returned to the pool
+                handle["cancel"] = None
+
+# Statement timeout for the rest of the current transaction; reset when the connection goes back to the pool
+def set_statement_timeout(conn, timeout_ms):
+    conn.execute(text("select set_config('statement_timeout', :timeout, true)"), {"timeout": str(int(timeout_ms))})
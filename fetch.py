@@ -0,0 +1,171 @@
+# Arrow fetch path for PostgreSQL: COPY (query) TO STDOUT streams CSV from the server and pyarrow decodes it
+# straight into columns, so no Python object is created per value (unlike pd.read_sql). psycopg2 still hands each
+# CSV row to the copy thread as one bytes object, which is appended to a block; decoding works on whole blocks.
+import queue
+import re
+import threading
+import time
+import pandas as pd
+from sqlalchemy import text
+
+try: # Arrow fetch path is optional; callers fall back to pd.read_sql
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pa_csv = None
+
+COPY_BLOCK_BYTES = 1 << 20 # CSV bytes handed from the COPY thread to the decoder at a time
+COPY_QUEUE_BLOCKS = 16 # Blocks buffered between the COPY thread and the decoder (bounds memory)
+DECODE_BLOCK_BYTES = 4 << 20 # CSV bytes decoded into one Arrow record batch
+
+# Arrow types for PostgreSQL type OIDs; other types (text, interval, ...) are read as strings
+PG_ARROW_TYPES = {
+    16: pa.bool_(), 20: pa.int64(), 21: pa.int16(), 23: pa.int32(), 700: pa.float32(), 701: pa.float64(),
+    1700: pa.float64(), # numeric as float64 instead of per-value Decimal objects
+    1082: pa.date32(), 1083: pa.time64('us'), 1114: pa.timestamp('us'),
+} if pa is not None else {}
+PG_INTERVAL_OID = 1186 # Converted to timedelta after decoding, like pd.read_sql does
+
+def arrow_available():
+    return pa is not None
+
+# File-like pipe between copy_expert (writes rows) and pyarrow (reads blocks), counting bytes and decoder wait time
+class _CopyStream:
+    def __init__(self):
+        self.blocks = queue.Queue(maxsize=COPY_QUEUE_BLOCKS)
+        self.pending = bytearray() # Rows not yet handed to the decoder
+        self.buffer = b"" # Block being read by the decoder
+        self.done = False
+        self.stopped = False # Reader gave up: drop the remaining rows
+        self.closed = False # Checked by pyarrow's file wrapper
+        self.bytes = 0
+        self.wait = 0.0
+        self.first_write = None # When the server sent the first row
+
+    def write(self, data): # Called by copy_expert once per row (psycopg2 gives COPY TO no larger reads): one bytes object and one append per row
+        if self.stopped:
+            return
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+        self.pending += data
+        if len(self.pending) >= COPY_BLOCK_BYTES:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.bytes += len(self.pending)
+            self.blocks.put(bytes(self.pending))
+            self.pending = bytearray()
+
+    def finish(self, error=None): # End of data, or the error raised by COPY
+        if self.stopped:
+            return
+        self.flush()
+        self.blocks.put(error if error is not None else b"")
+
+    def read(self, size=-1):
+        if self.stopped:
+            return b""
+        while not self.done and (size < 0 or len(self.buffer) < size):
+            start = time.perf_counter()
+            block = self.blocks.get() # Waits for the server
+            self.wait += time.perf_counter() - start
+            if isinstance(block, Exception):
+                raise block
+            self.done = not block
+            self.buffer += block
+        size = len(self.buffer) if size < 0 else size
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def stop(self): # Reader stopped early: unblock the COPY thread and discard whatever it still sends
+        self.stopped = True
+        while not self.blocks.empty():
+            self.blocks.get_nowait()
+        self.blocks.put(b"") # Wake a read-ahead still waiting for the server
+
+# Bind parameters on the client and strip the trailing semicolon and comment, which COPY (...) does not accept
+def _bound_sql(cursor, conn, query, params):
+    query = re.sub(r";\s*(--[^\n]*)?\s*$", "", query.rstrip())
+    compiled = text(query).compile(dialect=conn.dialect) # :name to %(name)s, literal % escaped
+    return cursor.mogrify(compiled.string, params or {}).decode()
+
+# Stream a query's result as Arrow record batches over a SQLAlchemy connection.
+# stats (optional dict) receives rows, bytes, wait_ms (waiting for the server), decode_ms, execute_ms (until
+# the first row) and transfer_ms (first row to last; includes waits while the decoder is busy).
+def iter_arrow_batches(conn, query, params=None, stats=None):
+    stats = {} if stats is None else stats
+    stats.update({"rows": 0, "bytes": 0, "wait_ms": 0.0, "decode_ms": 0.0, "execute_ms": 0.0, "transfer_ms": 0.0})
+    start = time.perf_counter()
+    cursor = conn.connection.cursor() # psycopg2 cursor on the pooled connection
+    sql = _bound_sql(cursor, conn, query, params)
+    cursor.execute(f"select * from (\n{sql}\n) as q limit 0") # Column names and types only
+    columns = [(col.name, col.type_code) for col in cursor.description]
+    schema = pa.schema([(name, PG_ARROW_TYPES.get(oid, pa.string())) for name, oid in columns])
+    stats["schema"] = schema
+    stats["intervals"] = [name for name, oid in columns if oid == PG_INTERVAL_OID]
+
+    stream = _CopyStream()
+    copy_end = []
+    def copy_out():
+        try:
+            cursor.copy_expert(f"copy (\n{sql}\n) to stdout with (format csv)", stream)
+            stream.finish()
+        except Exception as e:
+            stream.finish(e)
+        copy_end.append(time.perf_counter())
+    thread = threading.Thread(target=copy_out, name="copy-out", daemon=True)
+    thread.start()
+    finished = False
+    try:
+        decode_start = time.perf_counter()
+        reader = pa_csv.open_csv(
+            pa.PythonFile(stream, mode='r'),
+            read_options=pa_csv.ReadOptions(column_names=schema.names, block_size=DECODE_BLOCK_BYTES,
+                                            use_threads=False), # No read-ahead thread: only this generator reads the stream
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True), # Quoted text may contain newlines
+            convert_options=pa_csv.ConvertOptions(column_types=schema, true_values=['t'], false_values=['f'],
+                                                  strings_can_be_null=True, quoted_strings_can_be_null=False)) # NULL is unquoted, '' is quoted
+        for batch in reader:
+            stats["rows"] += batch.num_rows
+            stats["decode_ms"] = (time.perf_counter() - decode_start - stream.wait) * 1000
+            yield batch
+        finished = True
+    except pa.ArrowInvalid as e:
+        if "Empty CSV file" not in str(e): # No rows at all
+            raise
+        finished = True
+    finally:
+        if not finished: # Reader stopped early or failed: cancel the COPY on the server
+            stream.stop()
+            conn.connection.dbapi_connection.cancel()
+        thread.join()
+        if not finished:
+            conn.rollback() # The cancelled COPY aborted the transaction
+        stats["bytes"] = stream.bytes
+        stats["wait_ms"] = stream.wait * 1000
+        first_row = stream.first_write or copy_end[0]
+        stats["execute_ms"] = (first_row - start) * 1000 # Includes the column description query
+        stats["transfer_ms"] = (copy_end[0] - first_row) * 1000
+
+# Arrow-backed DataFrame from a table or batch (interval columns become timedelta like pd.read_sql)
+def arrow_to_frame(table, intervals=()):
+    df = table.to_pandas(types_mapper=pd.ArrowDtype)
+    for col in intervals:
+        df[col] = pd.to_timedelta(df[col].astype('string'), errors='coerce')
+    return df
+
+# Chunked iterator: one Arrow-backed DataFrame per decoded batch, for callers that do not need the whole result
+def iter_arrow_frames(conn, query, params=None, stats=None):
+    stats = {} if stats is None else stats
+    for batch in iter_arrow_batches(conn, query, params, stats):
+        yield arrow_to_frame(pa.Table.from_batches([batch]), stats["intervals"])
+
+# Whole result as one Arrow-backed DataFrame; stats receives rows, bytes, wait_ms and decode_ms
+def fetch_arrow_frame(conn, query, params=None, stats=None):
+    stats = {} if stats is None else stats
+    batches = list(iter_arrow_batches(conn, query, params, stats))
+    start = time.perf_counter()
+    df = arrow_to_frame(pa.Table.from_batches(batches, schema=stats["schema"]), stats["intervals"])
+    stats["decode_ms"] += (time.perf_counter() - start) * 1000
+    return df
@@ -0,0 +1,60 @@
+# Global dashboard filters: compiled into a parameterized WHERE clause and pushed into every query
+import re
+
+# Low-cardinality columns offered as multiselect filters (options come from the rollup dimensions)
+CATEGORY_FILTER_COLUMNS = ['country_name', 'violation', 'driver_gender', 'driver_race']
+AGE_LIMITS = (16, 100) # Driver age slider range; the full range means no age filter
+HOUR_LIMITS = (0, 23) # Hour band slider range; the full range means no hour filter
+
+# Bounds for the date range picker (read from the stop_date index)
+DATE_BOUNDS_SQL = "select min(stop_date) as first_date, max(stop_date) as last_date from traffic_stops"
+
+# Normalised filters: only active filters are kept, so equal selections give equal cache keys
+def make_filters(date_range=None, categories=None, age_range=None, hour_band=None):
+    filters = {}
+    if date_range and len(date_range) == 2: # Inclusive stop_date range (the date picker returns one date while a range is being picked)
+        filters["date_range"] = (date_range[0], date_range[1])
+    for col, values in (categories or {}).items():
+        if col not in CATEGORY_FILTER_COLUMNS:
+            raise ValueError(f"Unknown filter column: {col}")
+        if values: # Empty selection means no filter
+            filters[col] = tuple(sorted(values))
+    if age_range and tuple(age_range) != AGE_LIMITS:
+        filters["age_range"] = (int(age_range[0]), int(age_range[1]))
+    if hour_band and tuple(hour_band) != HOUR_LIMITS:
+        filters["hour_band"] = (int(hour_band[0]), int(hour_band[1]))
+    return filters
+
+def filter_key(filters): # Hashable form of the filters for cache keys
+    return tuple(sorted(filters.items()))
+
+# True if the filters only use rollup dimensions, so filtered counts can come from the rollup without a scan
+def rollup_can_filter(filters):
+    return "date_range" not in filters and "age_range" not in filters
+
+# WHERE conditions and bind parameters for the filters
+def build_filter_conditions(filters):
+    conditions, params = [], {}
+    if "date_range" in filters: # Pruned to the matching stop_date partitions
+        conditions.append("stop_date between :date_min and :date_max")
+        params["date_min"], params["date_max"] = filters["date_range"]
+    for col in CATEGORY_FILTER_COLUMNS:
+        if col in filters:
+            conditions.append(f"{col} = any(:f_{col})")
+            params[f"f_{col}"] = list(filters[col])
+    if "age_range" in filters: # Inclusive driver age range
+        conditions.append("driver_age between :age_min and :age_max")
+        params["age_min"], params["age_max"] = filters["age_range"]
+    if "hour_band" in filters: # Inclusive hour of the day range (matches the stop_hour expression index)
+        conditions.append("extract(hour from stop_time) between :hour_min and :hour_max")
+        params["hour_min"], params["hour_max"] = filters["hour_band"]
+    return conditions, params
+
+# Push the filters into a canned query: every "from traffic_stops" reads a filtered subquery instead.
+# PostgreSQL inlines the subquery, so the conditions reach the scan (partition pruning, indexes).
+def apply_filters(query, filters):
+    conditions, params = build_filter_conditions(filters)
+    if not conditions:
+        return query, {}
+    filtered = f"from (select * from traffic_stops where {' and '.join(conditions)}) as traffic_stops"
+    return re.sub(r"\bfrom\s+traffic_stops\b", filtered, query, flags=re.IGNORECASE), params
@@ -0,0 +1,122 @@
+# Bulk ingestion of CSV or Parquet files into traffic_stops using PostgreSQL COPY
+#
+# Usage:
+#   python ingest.py stops_2023.csv
+#   python ingest.py stops_2023.parquet --chunk-size 200000
+#   python ingest.py stops_2023.csv --restart    # ignore the saved checkpoint and load from the first row
+#
+# Files are streamed in chunks so memory stays bounded by the chunk size. Each chunk is normalized with the
+# same rules as the dashboard (see cleaning.py), copied in, and checkpointed in the same transaction, so an
+# interrupted load resumes after the last committed chunk without duplicating rows. Every row of the file is kept:
+# duplicate submissions are only rejected for form logs (log_key), never for bulk loads.
+import argparse
+import io
+import os
+import sys
+import time
+import pandas as pd
+from sqlalchemy import create_engine
+from config import DB_URL
+from cleaning import TABLE_COLUMNS, normalize_values, time_of_day_seconds
+
+try: # Parquet support is optional
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+CHECKPOINT_TABLE_SQL = """create table if not exists ingest_checkpoints (
+source text primary key, -- Absolute path of the ingested file
+rows_done bigint not null, -- Rows committed so far
+updated_at timestamptz not null default now()
+)"""
+
+CHECKPOINT_UPSERT_SQL = """insert into ingest_checkpoints (source, rows_done, updated_at) values (%s, %s, now())
+on conflict (source) do update set rows_done = excluded.rows_done, updated_at = excluded.updated_at"""
+
+COPY_SQL = f"copy traffic_stops ({', '.join(TABLE_COLUMNS)}) from stdin with (format csv, null '')"
+
+# Normalize one chunk for COPY: dashboard fill rules, valid ISO dates and times, missing columns as NULL
+def prepare_chunk(chunk):
+    chunk = chunk.reindex(columns=TABLE_COLUMNS) # Ignore extra columns, add missing ones as NULL
+    chunk = normalize_values(chunk) # 'Unknown' text, boolean flags, median age for this chunk
+    chunk['stop_date'] = pd.to_datetime(chunk['stop_date'], errors='coerce').dt.strftime('%Y-%m-%d') # Bad dates become NULL
+    seconds = time_of_day_seconds(chunk['stop_time'])
+    chunk['stop_time'] = pd.to_timedelta(seconds.astype('float64'), unit='s').astype('string').str[-8:] # 'HH:MM:SS'
+    for col in ('search_conducted', 'drugs_related_stop', 'is_arrested'):
+        chunk[col] = chunk[col].map({True: 't', False: 'f'}) # PostgreSQL boolean literals
+    return chunk
+
+# Stream a CSV or Parquet file as DataFrames of at most chunk_size rows, skipping the first skip_rows rows
+def read_chunks(path, file_format, chunk_size, skip_rows=0):
+    if file_format == 'csv':
+        # A callable keeps resuming O(1) in memory; a range would be turned into a set of skip_rows line numbers
+        yield from pd.read_csv(path, chunksize=chunk_size, skiprows=lambda line: 0 < line <= skip_rows, dtype=str, keep_default_na=True)
+        return
+    if pq is None:
+        raise SystemExit("❌ Parquet ingestion needs pyarrow: pip install pyarrow")
+    parquet = pq.ParquetFile(path)
+    seen = 0
+    for batch in parquet.iter_batches(batch_size=chunk_size):
+        if seen + batch.num_rows <= skip_rows: # Whole batch already loaded
+            seen += batch.num_rows
+            continue
+        chunk = batch.to_pandas()
+        if seen < skip_rows: # Partially loaded batch
+            chunk = chunk.iloc[skip_rows - seen:]
+        seen += batch.num_rows
+        yield chunk
+
+def read_checkpoint(cursor, source):
+    cursor.execute("select rows_done from ingest_checkpoints where source = %s", (source,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+# Load a file into traffic_stops chunk by chunk; returns the number of rows loaded in this run
+def ingest_file(path, file_format=None, chunk_size=100000, restart=False, db_url=DB_URL):
+    source = os.path.abspath(path)
+    file_format = file_format or ('parquet' if path.lower().endswith(('.parquet', '.pq')) else 'csv')
+    engine = create_engine(db_url)
+    conn = engine.raw_connection() # psycopg2 connection for COPY FROM STDIN
+    try:
+        cursor = conn.cursor()
+        cursor.execute(CHECKPOINT_TABLE_SQL)
+        conn.commit()
+        rows_done = 0 if restart else read_checkpoint(cursor, source)
+        if rows_done:
+            print(f"↪️ Resuming {source} after {rows_done:,} rows")
+        loaded, start = 0, time.perf_counter()
+        for chunk in read_chunks(path, file_format, chunk_size, rows_done):
+            if chunk.empty: # Nothing left after the checkpoint
+                continue
+            chunk_start = time.perf_counter()
+            buffer = io.StringIO()
+            prepare_chunk(chunk).to_csv(buffer, index=False, header=False, na_rep='')
+            buffer.seek(0)
+            cursor.copy_expert(COPY_SQL, buffer)
+            rows_done += len(chunk)
+            cursor.execute(CHECKPOINT_UPSERT_SQL, (source, rows_done)) # Checkpoint commits together with the chunk
+            conn.commit()
+            loaded += len(chunk)
+            chunk_rate = len(chunk) / max(time.perf_counter() - chunk_start, 1e-9)
+            print(f"✅ {rows_done:,} rows committed ({chunk_rate:,.0f} rows/s for this chunk)")
+        elapsed = time.perf_counter() - start
+        print(f"📦 Loaded {loaded:,} rows in {elapsed:.1f}s ({loaded / max(elapsed, 1e-9):,.0f} rows/s)")
+        return loaded
+    except Exception:
+        conn.rollback() # The failed chunk is not committed; rerun to resume from the checkpoint
+        raise
+    finally:
+        conn.close()
+        engine.dispose()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk load CSV or Parquet files into traffic_stops with COPY")
+    parser.add_argument("path", help="CSV or Parquet file to load")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="File format (default: from the file extension)")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Rows per chunk (bounds memory use)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint and load from the first row")
+    args = parser.parse_args(argv)
+    ingest_file(args.path, args.format, args.chunk_size, args.restart)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# Per-query timings by phase (connect, execute, transfer, convert, render), percentiles and Prometheus text
+import json
+import os
+import threading
+import time
+from collections import deque
+import pandas as pd
+from queries import medium_query_map, advanced_query_map
+from migrations import plan_summary
+
+PHASES = ["connect", "execute", "transfer", "convert", "render"]
+QUANTILES = [0.5, 0.95, 0.99]
+SAMPLE_WINDOW = 1000 # Most recent samples kept per query and phase (percentiles cover this window)
+EXPLAIN_INTERVAL = 60 # Seconds before the same query's plan is captured again
+
+# Short names for the canned queries (medium_1 ... advanced_6), used as the Prometheus label
+QUERY_NAMES = {query: f"medium_{i}" for i, query in enumerate(medium_query_map.values(), 1)}
+QUERY_NAMES.update({query: f"advanced_{i}" for i, query in enumerate(advanced_query_map.values(), 1)})
+QUERY_LABELS = {QUERY_NAMES[query]: label for label, query in list(medium_query_map.items()) + list(advanced_query_map.items())}
+
+def query_name(query, default="other"):
+    return QUERY_NAMES.get(query, default)
+
+# Shared timing state: {"queries": {name: entry}, "explains": {name: plan}, "lock"}
+def new_query_stats():
+    return {"queries": {}, "explains": {}, "lock": threading.Lock()}
+
+def _entry(stats, name):
+    if name not in stats["queries"]:
+        stats["queries"][name] = {
+            "calls": 0, "rows": 0, "bytes": 0, "errors": 0, "cache": {"hit": 0, "miss": 0, "rollup": 0},
+            "samples": {phase: deque(maxlen=SAMPLE_WINDOW) for phase in PHASES + ["total"]}, # Milliseconds
+            "sums": {phase: 0.0 for phase in PHASES + ["total"]}, # All-time totals for the Prometheus _sum series
+            "counts": {phase: 0 for phase in PHASES + ["total"]},
+        }
+    return stats["queries"][name]
+
+def _add_sample(entry, phase, ms):
+    entry["samples"][phase].append(ms)
+    entry["sums"][phase] += ms
+    entry["counts"][phase] += 1
+
+# Record one database fetch: phases is {phase: ms} for connect/execute/transfer/convert
+def record_timings(stats, name, phases, rows, nbytes=0):
+    with stats["lock"]:
+        entry = _entry(stats, name)
+        entry["calls"] += 1
+        entry["rows"] += rows
+        entry["bytes"] += nbytes or 0
+        for phase, ms in phases.items():
+            _add_sample(entry, phase, ms)
+        _add_sample(entry, "total", sum(phases.values()))
+
+def record_render(stats, name, ms): # Time spent building and sending a table or chart
+    with stats["lock"]:
+        _add_sample(_entry(stats, name), "render", ms)
+
+def record_cache_lookup(stats, name, result): # result is 'hit', 'miss' or 'rollup'
+    with stats["lock"]:
+        _entry(stats, name)["cache"][result] += 1
+
+def record_error(stats, name):
+    with stats["lock"]:
+        _entry(stats, name)["errors"] += 1
+
+# Mark a plan capture as started; returns False if this query's plan was captured recently
+def claim_explain(stats, name):
+    with stats["lock"]:
+        previous = stats["explains"].get(name)
+        if previous is not None and time.time() - previous["at"] < EXPLAIN_INTERVAL:
+            return False
+        stats["explains"][name] = {"at": time.time(), "ms": None, "summary": "capturing...", "plan": None}
+        return True
+
+def record_explain(stats, name, slow_ms, plan): # plan is the EXPLAIN (FORMAT JSON) result
+    plan = plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+    with stats["lock"]:
+        stats["explains"][name] = {"at": time.time(), "ms": round(slow_ms, 2), "summary": plan_summary(plan["Plan"]), "plan": plan}
+
+def _percentiles(samples):
+    values = pd.Series(list(samples), dtype="float64")
+    return {f"p{int(q * 100)} (ms)": round(values.quantile(q), 2) for q in QUANTILES}
+
+# One row per query: calls, rows, bytes, cache counts and total fetch time percentiles
+def query_summary_table(stats):
+    with stats["lock"]:
+        rows = [{
+            "Query": name, "Label": QUERY_LABELS.get(name, name), "Calls": entry["calls"], "Rows": entry["rows"],
+            "MB": round(entry["bytes"] / 1024 ** 2, 2), "Cache Hits": entry["cache"]["hit"], "Cache Misses": entry["cache"]["miss"],
+            "Rollup Answers": entry["cache"]["rollup"], "Errors": entry["errors"], **_percentiles(entry["samples"]["total"]),
+        } for name, entry in sorted(stats["queries"].items())]
+    return pd.DataFrame(rows)
+
+# One row per query and phase with sample count and p50/p95/p99
+def phase_percentile_table(stats):
+    with stats["lock"]:
+        rows = [{"Query": name, "Phase": phase, "Samples": len(entry["samples"][phase]), **_percentiles(entry["samples"][phase])}
+                for name, entry in sorted(stats["queries"].items()) for phase in PHASES if entry["samples"][phase]]
+    return pd.DataFrame(rows)
+
+def _label_value(value): # Escape a Prometheus label value
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# Prometheus text exposition format: a summary per query and phase plus counters
+def prometheus_text(stats):
+    lines = ["# HELP securecheck_query_phase_seconds Query phase duration (quantiles over the most recent samples).",
+             "# TYPE securecheck_query_phase_seconds summary"]
+    counters = {"calls": [], "rows": [], "bytes": [], "errors": [], "cache": []}
+    with stats["lock"]:
+        for name, entry in sorted(stats["queries"].items()):
+            query = _label_value(name)
+            for phase in PHASES + ["total"]:
+                samples = entry["samples"][phase]
+                if not samples:
+                    continue
+                values = pd.Series(list(samples), dtype="float64") / 1000
+                for q in QUANTILES:
+                    lines.append(f'securecheck_query_phase_seconds{{query="{query}",phase="{phase}",quantile="{q}"}} {values.quantile(q):.6f}')
+                lines.append(f'securecheck_query_phase_seconds_sum{{query="{query}",phase="{phase}"}} {entry["sums"][phase] / 1000:.6f}')
+                lines.append(f'securecheck_query_phase_seconds_count{{query="{query}",phase="{phase}"}} {entry["counts"][phase]}')
+            for counter in ("calls", "rows", "bytes", "errors"):
+                counters[counter].append(f'securecheck_query_{counter}_total{{query="{query}"}} {entry[counter]}')
+            for result, count in entry["cache"].items():
+                counters["cache"].append(f'securecheck_query_cache_total{{query="{query}",result="{result}"}} {count}')
+    descriptions = {"calls": "Database fetches", "rows": "Rows fetched", "bytes": "Bytes transferred (Arrow fetch path)",
+                    "errors": "Failed fetches", "cache": "Query cache lookups by result (hit, miss, rollup)"}
+    for counter, series in counters.items():
+        lines += [f"# HELP securecheck_query_{counter}_total {descriptions[counter]}.", f"# TYPE securecheck_query_{counter}_total counter"] + series
+    return "\n".join(lines) + "\n"
+
+# Write the Prometheus text to a file (e.g. for node_exporter's textfile collector), replacing it atomically
+def write_prometheus_file(stats, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(prometheus_text(stats))
+    os.replace(tmp_path, path)
@@ -0,0 +1,109 @@
+# Write path for new police logs: validation into a typed record and batched, idempotent inserts
+import datetime
+from dataclasses import dataclass, asdict
+from typing import Optional
+import pandas as pd
+from sqlalchemy import text
+
+STOP_DURATIONS = ["0-5 Min", "6-15 Min", "16-30 Min", "30+ Min"]
+DRIVER_GENDERS = ["M", "F"]
+
+# Columns written for each log and their PostgreSQL types (violation, stop_outcome and is_arrested are not collected by the form)
+LOG_COLUMN_TYPES = {
+    'stop_date': 'date',
+    'stop_time': 'time',
+    'country_name': 'text',
+    'driver_gender': 'text',
+    'driver_age': 'int',
+    'driver_race': 'text',
+    'search_conducted': 'boolean',
+    'search_type': 'text',
+    'drugs_related_stop': 'boolean',
+    'stop_duration': 'text',
+    'vehicle_number': 'text',
+}
+LOG_COLUMNS = list(LOG_COLUMN_TYPES)
+
+# One validated police log from the "Add New Police Log" form
+@dataclass(frozen=True)
+class PoliceLog:
+    stop_date: datetime.date
+    stop_time: datetime.time
+    country_name: str
+    driver_gender: str
+    driver_age: int
+    driver_race: Optional[str]
+    search_conducted: bool
+    search_type: Optional[str]
+    drugs_related_stop: bool
+    stop_duration: str
+    vehicle_number: str
+
+    # Deduplication key: the same vehicle cannot be stopped twice at the same moment
+    @property
+    def key(self):
+        return (self.vehicle_number, self.stop_date, self.stop_time)
+
+    # The key as stored in traffic_stops.log_key, e.g. 'TN01AB1234|2024-05-01|10:30:00'
+    @property
+    def log_key(self):
+        return "|".join(str(part) for part in self.key)
+
+# Validate raw form values into a PoliceLog, raising ValueError with a readable message
+def make_police_log(stop_date, stop_time, country_name, driver_gender, driver_age, driver_race,
+                    search_conducted, search_type, drugs_related_stop, stop_duration, vehicle_number):
+    vehicle_number = (vehicle_number or "").strip().upper()
+    country_name = (country_name or "").strip()
+    if not vehicle_number:
+        raise ValueError("Vehicle Number is required.")
+    if not country_name:
+        raise ValueError("Country Name is required.")
+    if driver_gender not in DRIVER_GENDERS:
+        raise ValueError(f"Driver Gender must be one of {DRIVER_GENDERS}.")
+    if stop_duration not in STOP_DURATIONS:
+        raise ValueError(f"Stop Duration must be one of {STOP_DURATIONS}.")
+    if not 16 <= int(driver_age) <= 100:
+        raise ValueError("Driver Age must be between 16 and 100.")
+    search_type = (search_type or "").strip() or None
+    return PoliceLog(
+        stop_date=stop_date,
+        stop_time=stop_time.replace(second=0, microsecond=0), # The form has minute precision
+        country_name=country_name,
+        driver_gender=driver_gender,
+        driver_age=int(driver_age),
+        driver_race=(driver_race or "").strip() or None,
+        search_conducted=bool(search_conducted),
+        search_type=search_type if search_conducted else None, # Search type only applies when a search was conducted
+        drugs_related_stop=bool(drugs_related_stop),
+        stop_duration=stop_duration,
+        vehicle_number=vehicle_number,
+    )
+
+# Build one multi-row INSERT that skips logs already submitted (same vehicle_number, stop_date and stop_time).
+# The unique log_key index (migration 6) turns a repeat into a conflict, so this also holds across app processes;
+# the conflict target is named, so the insert fails instead of writing duplicates when that index is missing.
+def build_insert_batch(records):
+    rows, params = [], {}
+    for i, record in enumerate(records):
+        rows.append("(" + ", ".join(f"cast(:{col}_{i} as {sql_type})" for col, sql_type in LOG_COLUMN_TYPES.items()) + f", :log_key_{i})")
+        params.update({f"{col}_{i}": value for col, value in asdict(record).items()})
+        params[f"log_key_{i}"] = record.log_key
+    columns = ", ".join(LOG_COLUMNS)
+    query = f"""insert into traffic_stops ({columns}, log_key)
+values {', '.join(rows)}
+on conflict (log_key, stop_date) do nothing
+returning {columns}"""
+    return query, params
+
+# Insert a batch in one transaction and return the rows that were actually written
+def insert_logs(engine, records):
+    first_seen = {}
+    for record in records: # Drop duplicates inside the batch, keeping the first submission
+        first_seen.setdefault(record.key, record)
+    unique = list(first_seen.values())
+    if not unique:
+        return pd.DataFrame(columns=LOG_COLUMNS)
+    query, params = build_insert_batch(unique)
+    with engine.begin() as conn: # One transaction for the whole batch
+        inserted = conn.execute(text(query), params).fetchall()
+    return pd.DataFrame(inserted, columns=LOG_COLUMNS)
@@ -0,0 +1,218 @@
+# Versioned schema migrations for traffic_stops, plus an EXPLAIN report for the canned queries
+#
+# Usage:
+#   python migrations.py status                 # show applied and pending migrations
+#   python migrations.py upgrade --report       # apply pending migrations, print each canned query's plan before and after
+#   python migrations.py report --analyze       # current plans with EXPLAIN ANALYZE timings
+#   python migrations.py partition              # convert traffic_stops to yearly range partitions on stop_date
+import argparse
+import json
+import sys
+from sqlalchemy import create_engine, text
+from config import DB_URL
+from queries import medium_query_map, advanced_query_map
+from vehicle_history import VEHICLE_HISTORY_MIGRATION, VEHICLE_HISTORY_TRIGGERS, VEHICLE_KEY_INDEX, VEHICLE_KEY_MIGRATION
+from pagination import PAGE_KEY_COLUMN_SQL, PAGE_INDEXES
+
+# Table definition with proper types (matches the README schema)
+TRAFFIC_STOPS_COLUMNS_SQL = """stop_date date,
+stop_time time,
+country_name text,
+driver_gender text,
+driver_age smallint,
+driver_race text,
+violation text,
+stop_outcome text,
+search_conducted boolean,
+search_type text,
+is_arrested boolean,
+drugs_related_stop boolean,
+stop_duration text,
+vehicle_number text"""
+
+# Indexes chosen for the filters and groupings used by the canned queries
+TRAFFIC_STOPS_INDEXES = [
+    # Medium 1: top vehicles in drug-related stops
+    "create index if not exists ix_traffic_stops_drug_vehicle on traffic_stops (vehicle_number) where drugs_related_stop",
+    # Medium 2: most frequently searched vehicles
+    "create index if not exists ix_traffic_stops_search_vehicle on traffic_stops (vehicle_number) where search_conducted",
+    # Medium 6 and 8, advanced 3: stops by hour of the day
+    "create index if not exists ix_traffic_stops_stop_hour on traffic_stops ((extract(hour from stop_time)))",
+    # Advanced 1 and 3: stops by year
+    "create index if not exists ix_traffic_stops_stop_year on traffic_stops ((extract(year from stop_date)))",
+    # Medium 3 and 10: stops by driver age
+    "create index if not exists ix_traffic_stops_driver_age on traffic_stops (driver_age) include (is_arrested, violation)",
+    # Medium 9 and 11, advanced 4 and 6: search and arrest counts per violation (index-only scans)
+    "create index if not exists ix_traffic_stops_violation on traffic_stops (violation) include (search_conducted, is_arrested)",
+    # Medium 12 to 14: rates per country and violation
+    "create index if not exists ix_traffic_stops_country_violation on traffic_stops (country_name, violation) include (is_arrested, search_conducted, drugs_related_stop)",
+    # Vehicle lookups by (vehicle_number, stop_date, stop_time)
+    "create index if not exists ix_traffic_stops_log_key on traffic_stops (vehicle_number, stop_date, stop_time)",
+]
+
+# Submission key of a form log (vehicle|date|time), set only by the log writer; ingested and historical rows keep NULL
+LOG_KEY_COLUMN_SQL = "alter table traffic_stops add column if not exists log_key text"
+
+# One row per form submission, so writers in different processes cannot insert the same log twice. NULL keys are never
+# equal, so existing rows are left as they are. Includes stop_date, the partition key, so it also works partitioned.
+LOG_KEY_UNIQUE_INDEX = "create unique index if not exists ux_traffic_stops_log_key on traffic_stops (log_key, stop_date)"
+
+# Dashboard date range filter and its min/max bounds (within the yearly partitions)
+STOP_DATE_INDEXES = ["create index if not exists ix_traffic_stops_stop_date on traffic_stops (stop_date)"]
+
+# Ordered list of (version, description, statements); append new migrations, never edit applied ones
+MIGRATIONS = [
+    (1, "create traffic_stops", [f"create table if not exists traffic_stops (\n{TRAFFIC_STOPS_COLUMNS_SQL}\n)"]),
+    (2, "create ingest_checkpoints", ["""create table if not exists ingest_checkpoints (
+source text primary key,
+rows_done bigint not null,
+updated_at timestamptz not null default now()
+)"""]),
+    (3, "partial and expression indexes for canned queries", TRAFFIC_STOPS_INDEXES + ["analyze traffic_stops"]),
+    (4, "stop_date index for the dashboard date filter", STOP_DATE_INDEXES),
+    (5, "vehicle_history summary table and triggers", VEHICLE_HISTORY_MIGRATION),
+    (6, "log_key column with a unique index for form submissions from several processes", [LOG_KEY_COLUMN_SQL, LOG_KEY_UNIQUE_INDEX]),
+    (7, "vehicle_history keyed on the upper-cased, trimmed vehicle number", VEHICLE_KEY_MIGRATION),
+    (8, "id row key and (column, id) indexes for table paging", [PAGE_KEY_COLUMN_SQL] + PAGE_INDEXES + ["analyze traffic_stops"]),
+]
+
+SCHEMA_MIGRATIONS_SQL = """create table if not exists schema_migrations (
+version int primary key,
+description text not null,
+applied_at timestamptz not null default now()
+)"""
+
+def applied_versions(conn):
+    conn.execute(text(SCHEMA_MIGRATIONS_SQL))
+    return {row[0] for row in conn.execute(text("select version from schema_migrations"))}
+
+# Apply pending migrations, each in its own transaction; returns the versions applied
+def upgrade(engine):
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn: # Statements and the version record commit together
+            for statement in statements:
+                conn.execute(text(statement))
+            conn.execute(text("insert into schema_migrations (version, description) values (:version, :description)"),
+                         {"version": version, "description": description})
+        print(f"✅ Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
+
+def status(engine):
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    for version, description, _ in MIGRATIONS:
+        print(f"{'✅' if version in done else '⏳'} {version}: {description}")
+
+# Convert traffic_stops into yearly range partitions on stop_date (rows outside the years go to a default partition)
+def partition_by_stop_date(engine):
+    with engine.begin() as conn: # One transaction: the table is never left half converted
+        is_partitioned = conn.execute(text(
+            "select exists (select 1 from pg_partitioned_table where partrelid = to_regclass('traffic_stops'))")).scalar()
+        if is_partitioned:
+            print("traffic_stops is already partitioned.")
+            return
+        unique_log_key = conn.execute(text("select to_regclass('ux_traffic_stops_log_key') is not null")).scalar() # Migration 6 applied
+        id_sequence = conn.execute(text("select pg_get_serial_sequence('traffic_stops', attname) from pg_attribute "
+                                        "where attrelid = to_regclass('traffic_stops') and attname = 'id'")).scalar() # Migration 8 applied
+        min_year, max_year = conn.execute(text(
+            "select cast(extract(year from min(stop_date)) as int), cast(extract(year from max(stop_date)) as int) from traffic_stops")).one()
+        conn.execute(text("alter table traffic_stops rename to traffic_stops_unpartitioned"))
+        conn.execute(text("create table traffic_stops (like traffic_stops_unpartitioned including defaults) partition by range (stop_date)"))
+        if min_year is not None:
+            for year in range(min_year, max_year + 2): # One spare year ahead for new logs
+                conn.execute(text(f"create table traffic_stops_y{year} partition of traffic_stops "
+                                  f"for values from ('{year}-01-01') to ('{year + 1}-01-01')"))
+        conn.execute(text("create table traffic_stops_default partition of traffic_stops default"))
+        conn.execute(text("insert into traffic_stops select * from traffic_stops_unpartitioned"))
+        if id_sequence: # The new id column uses the same sequence, which would otherwise be dropped with the old table
+            conn.execute(text(f"alter sequence {id_sequence} owned by traffic_stops.id"))
+        conn.execute(text("drop table traffic_stops_unpartitioned")) # Also drops the old indexes
+        indexes = TRAFFIC_STOPS_INDEXES + STOP_DATE_INDEXES
+        if unique_log_key:
+            indexes = indexes + [LOG_KEY_UNIQUE_INDEX]
+        if id_sequence:
+            indexes = indexes + PAGE_INDEXES
+        for statement in indexes: # Indexes on the parent are created on every partition
+            conn.execute(text(statement))
+        if conn.execute(text("select to_regclass('vehicle_history') is not null")).scalar(): # Triggers and the vehicle key index went with the old table
+            for statement in [VEHICLE_KEY_INDEX] + VEHICLE_HISTORY_TRIGGERS:
+                conn.execute(text(statement))
+        conn.execute(text("analyze traffic_stops"))
+    print(f"✅ traffic_stops partitioned by year ({min_year}-{max_year})")
+
+def has_traffic_stops(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("select to_regclass('traffic_stops') is not null")).scalar()
+
+# EXPLAIN every canned query; returns {label: {"cost", "plan", "ms"}}
+def explain_canned_queries(engine, analyze=False):
+    options = "analyze, buffers, format json" if analyze else "format json"
+    plans = {}
+    with engine.connect() as conn:
+        for label, query in list(medium_query_map.items()) + list(advanced_query_map.items()):
+            plan = conn.execute(text(f"explain ({options}) {query}")).scalar()
+            plan = plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+            plans[label] = {
+                "cost": plan["Plan"]["Total Cost"], # Planner estimate
+                "plan": plan_summary(plan["Plan"]), # Node types from the top of the plan down
+                "ms": plan.get("Execution Time"), # Only with analyze
+            }
+    return plans
+
+# Compact one-line summary of a plan tree, e.g. "Limit > Sort > HashAggregate > Index Only Scan"
+def plan_summary(node):
+    name = node["Node Type"]
+    if "Index Name" in node:
+        name += f" ({node['Index Name']})"
+    children = node.get("Plans", [])
+    return name if not children else f"{name} > " + " | ".join(plan_summary(child) for child in children)
+
+def print_plan_report(before, after=None):
+    for label in before:
+        print(f"\n🔍 {label}")
+        print(f"   before: cost {before[label]['cost']:,.0f}" + (f", {before[label]['ms']:.1f} ms" if before[label]['ms'] is not None else ""))
+        print(f"           {before[label]['plan']}")
+        if after:
+            print(f"   after:  cost {after[label]['cost']:,.0f}" + (f", {after[label]['ms']:.1f} ms" if after[label]['ms'] is not None else ""))
+            print(f"           {after[label]['plan']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="traffic_stops schema migrations and query plan report")
+    parser.add_argument("command", choices=["status", "upgrade", "report", "partition"])
+    parser.add_argument("--report", action="store_true", help="With upgrade: print each canned query's plan before and after")
+    parser.add_argument("--analyze", action="store_true", help="Use EXPLAIN (ANALYZE, BUFFERS) and show execution times")
+    parser.add_argument("--output", help="Also write the plan report as JSON to this file")
+    args = parser.parse_args(argv)
+    engine = create_engine(DB_URL)
+    before = after = None
+    if args.command == "status":
+        status(engine)
+    elif args.command == "upgrade":
+        if args.report and has_traffic_stops(engine):
+            with engine.begin() as conn: # Fresh statistics so the before and after plans are comparable
+                conn.execute(text("analyze traffic_stops"))
+            before = explain_canned_queries(engine, args.analyze)
+        upgrade(engine)
+        after = explain_canned_queries(engine, args.analyze) if args.report else None
+        if before is None and after is not None: # New database: nothing to compare against
+            before, after = after, None
+    elif args.command == "report":
+        before = explain_canned_queries(engine, args.analyze)
+    elif args.command == "partition":
+        before = explain_canned_queries(engine, args.analyze) if args.report else None
+        partition_by_stop_date(engine)
+        after = explain_canned_queries(engine, args.analyze) if args.report else None
+    if before:
+        print_plan_report(before, after)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"before": before, "after": after}, f, indent=2)
+
+if __name__ == "__main__":
+    sys.exit(main())
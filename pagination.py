@@ -0,0 +1,89 @@
+# Server-side keyset pagination for the traffic_stops table view
+# Pages are fetched with ORDER BY <column>, id and a cursor (last row seen) instead of OFFSET. id is the surrogate
+# row key added by migration 8, and each sortable column has a (column, id) index, so a page is an index range read
+# that stops after page_size rows no matter how deep the user scrolls. Rows with a NULL sort value come last and are
+# read in a separate branch ordered by id, so no OR condition keeps the index from being used.
+import pandas as pd
+from cleaning import TABLE_COLUMNS # Only these columns may be sorted on
+from filters import build_filter_conditions
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Surrogate row key for the cursor (stable across UPDATE and VACUUM FULL, unlike ctid)
+PAGE_KEY_COLUMN_SQL = "alter table traffic_stops add column if not exists id bigserial"
+PAGE_KEY_EXISTS_SQL = """select count(*) as available from pg_attribute
+where attrelid = to_regclass('traffic_stops') and attname = 'id' and not attisdropped""" # 0 until migration 8 is applied
+
+# One (column, id) index per sortable column: serves both directions and the NULL branch (column is null, ordered by id)
+PAGE_INDEXES = [f"create index if not exists ix_traffic_stops_page_{col} on traffic_stops ({col}, id)" for col in TABLE_COLUMNS]
+
+def escape_like(value): # Match %, _ and \ literally in a LIKE pattern
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# Build the WHERE conditions and bind parameters for the global filters (see filters.py) and the vehicle search
+def build_filter_clause(filters=None, vehicle_search=""):
+    conditions, params = build_filter_conditions(filters or {})
+    if vehicle_search: # Case-insensitive substring match on vehicle number
+        conditions.append("vehicle_number ilike :vehicle_search escape '\\'")
+        params["vehicle_search"] = f"%{escape_like(vehicle_search)}%"
+    return conditions, params
+
+# Build the SQL for one page; cursor is (sort value, id) of the last row on the previous page or None for page 1.
+# The page is read from two index-ordered branches, each stopping after page_limit rows: rows with a sort value
+# after the cursor, then rows with a NULL sort value. The outer sort only orders those few rows.
+def build_page_query(sort_column, descending, cursor, page_size, filters=None, vehicle_search=""):
+    if sort_column not in TABLE_COLUMNS:
+        raise ValueError(f"Unknown sort column: {sort_column}")
+    conditions, params = build_filter_clause(filters, vehicle_search)
+    direction = "desc" if descending else "asc"
+    after = "<" if descending else ">"
+    value_conditions = conditions + [f"{sort_column} is not null"]
+    null_conditions = conditions + [f"{sort_column} is null"]
+    if cursor is not None: # Keyset condition: rows that sort after the cursor
+        last_value, params["cursor_id"] = cursor
+        if last_value is not None: # Every NULL row still comes after the cursor
+            params["cursor_value"] = last_value
+            value_conditions.append(f"({sort_column}, id) {after} (:cursor_value, :cursor_id)")
+        else: # Already in the NULL rows: the value branch is done
+            value_conditions = None
+            null_conditions.append(f"id {after} :cursor_id")
+    params["page_limit"] = page_size + 1 # One extra row tells us whether a next page exists
+    columns = ', '.join(TABLE_COLUMNS)
+    branches = []
+    if value_conditions is not None:
+        branches.append(f"""(select 0 as row_branch, id as row_id, {columns}
+from traffic_stops
+where {' and '.join(value_conditions)}
+order by {sort_column} {direction}, id {direction}
+limit :page_limit)""")
+    branches.append(f"""(select 1 as row_branch, id as row_id, {columns}
+from traffic_stops
+where {' and '.join(null_conditions)}
+order by id {direction}
+limit :page_limit)""")
+    union = "\nunion all\n".join(branches)
+    query = f"""select * from (
+{union}
+) as page
+order by row_branch, {sort_column} {direction}, row_id {direction}
+limit :page_limit"""
+    return query, params
+
+# Split a fetched page into the visible rows, the cursor for the next page and whether one exists
+def split_page(page_df, sort_column, page_size):
+    if page_df.empty: # Failed query or no matching rows
+        return page_df.drop(columns=["row_branch", "row_id"], errors="ignore"), None, False
+    has_next = len(page_df) > page_size
+    page_df = page_df.head(page_size)
+    next_cursor = None
+    if has_next:
+        last = page_df.iloc[-1]
+        value = last[sort_column]
+        if pd.isna(value): # NULL sort value
+            value = None
+        elif isinstance(value, pd.Timestamp): # Timestamps to datetime for the driver
+            value = value.to_pydatetime()
+        elif hasattr(value, "item"): # numpy scalars to plain Python values for the driver
+            value = value.item()
+        next_cursor = (value, int(last["row_id"]))
+    return page_df.drop(columns=["row_branch", "row_id"]), next_cursor, has_next
@@ -0,0 +1,78 @@
+# Lookup index for the "Predict Outcome and Violation" form
+# Counts of stop_outcome and violation are kept per key combination, so a prediction is a dict lookup
+# instead of a scan of the whole dataset.
+
+# Form fields used to find similar stops
+PREDICTION_KEYS = ['driver_gender', 'driver_age', 'search_conducted', 'stop_duration', 'drugs_related_stop']
+
+# Back-off hierarchy: if a key combination has no past stops, drop keys until one does
+BACKOFF_LEVELS = [
+    ['driver_gender', 'driver_age', 'search_conducted', 'stop_duration', 'drugs_related_stop'],
+    ['driver_gender', 'search_conducted', 'stop_duration', 'drugs_related_stop'], # Drop exact age
+    ['driver_gender', 'search_conducted', 'drugs_related_stop'], # Drop stop duration
+    ['search_conducted', 'drugs_related_stop'], # Drop gender
+    [], # All stops
+]
+
+PREDICTION_TARGETS = ['stop_outcome', 'violation']
+
+# Default prediction when there is no data at all
+DEFAULT_PREDICTION = {"stop_outcome": "Warning", "violation": "Speeding"}
+
+# Convert a key value to the plain Python type used in index keys
+def _key_value(col, value):
+    if col == 'driver_age':
+        return int(value)
+    if col in ('search_conducted', 'drugs_related_stop'):
+        return bool(value)
+    return str(value)
+
+def new_prediction_index():
+    return {"levels": [{} for _ in BACKOFF_LEVELS], "rows": 0}
+
+# Add the stops in a cleaned DataFrame to the index (used for the full build and for new logs).
+# Stops without a recorded target (NULL, or 'Unknown' after cleaning, as for form logs) are not counted for it.
+def update_prediction_index(index, df):
+    if df.empty or not set(PREDICTION_KEYS + PREDICTION_TARGETS).issubset(df.columns):
+        return index
+    known = {target: df[df[target].notna() & (df[target] != 'Unknown')] for target in PREDICTION_TARGETS}
+    for level, keys in zip(index["levels"], BACKOFF_LEVELS):
+        for target in PREDICTION_TARGETS:
+            rows = known[target]
+            counts = rows.groupby(keys + [target], observed=True).size() if keys else rows.groupby(target, observed=True).size()
+            for group, count in counts.items():
+                group = group if isinstance(group, tuple) else (group,)
+                key = tuple(_key_value(col, value) for col, value in zip(keys, group[:-1]))
+                entry = level.setdefault(key, {"count": 0, "stop_outcome": {}, "violation": {}})
+                entry[target][str(group[-1])] = entry[target].get(str(group[-1]), 0) + int(count)
+                if target == 'stop_outcome': # Each stop has at most one outcome, so this counts stops with a known outcome
+                    entry["count"] += int(count)
+    index["rows"] += len(df)
+    return index
+
+def build_prediction_index(df):
+    return update_prediction_index(new_prediction_index(), df)
+
+# Most common value; ties go to the alphabetically first value, like pandas Series.mode()[0]
+def _mode(counts):
+    return min(counts.items(), key=lambda item: (-item[1], item[0]))[0]
+
+# Predict the stop outcome and violation for one log, backing off to fewer keys when there is no match
+def predict_outcome(index, driver_gender, driver_age, search_conducted, stop_duration, drugs_related_stop):
+    values = {
+        'driver_gender': driver_gender,
+        'driver_age': driver_age,
+        'search_conducted': search_conducted,
+        'stop_duration': stop_duration,
+        'drugs_related_stop': drugs_related_stop,
+    }
+    for level, keys in zip(index["levels"], BACKOFF_LEVELS):
+        entry = level.get(tuple(_key_value(col, values[col]) for col in keys))
+        if entry and entry["stop_outcome"] and entry["violation"]: # Back off until both targets have past values
+            return {
+                "stop_outcome": _mode(entry["stop_outcome"]),
+                "violation": _mode(entry["violation"]),
+                "matches": entry["count"], # Past stops behind this prediction
+                "matched_on": keys, # Fields that had to match
+            }
+    return dict(DEFAULT_PREDICTION, matches=0, matched_on=[])
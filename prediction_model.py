@@ -0,0 +1,254 @@
+# Trained prediction model for the "Predict Outcome and Violation" form: a count-based naive Bayes classifier per
+# target, trained on traffic_stops and saved as a versioned JSON artifact that the dashboard loads once per process
+#
+# Usage:
+#   python prediction_model.py train                            # train on traffic_stops and save the artifact
+#   python prediction_model.py report --output model_report.json # holdout accuracy and latency vs the lookup index
+#   python prediction_model.py score --output scores.parquet     # re-score every historical stop in batch
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+from config import DB_URL, MODEL_PATH
+from cleaning import TABLE_COLUMNS, clean_data
+from fetch import arrow_available, fetch_arrow_frame
+from prediction import PREDICTION_TARGETS, build_prediction_index, predict_outcome
+
+MODEL_FORMAT = 1 # Artifact layout version; artifacts written with another layout are rejected on load
+MODEL_ALPHA = 1.0 # Laplace smoothing for value counts
+AGE_BAND = 5 # Driver ages are grouped into 5-year bands
+HOLDOUT_SHARE = 0.2 # Latest share of stop dates held out by the report
+
+# Features used by the model: form fields plus country, race, hour of day and weekday
+MODEL_FEATURES = ['driver_gender', 'age_band', 'driver_race', 'country_name', 'search_conducted',
+                  'drugs_related_stop', 'stop_duration', 'stop_hour', 'weekday']
+
+# Feature values as strings (the artifact's JSON keys); missing values stay <NA> and carry no evidence
+def model_features(df):
+    age = pd.to_numeric(df['driver_age'], errors='coerce')
+    seconds = pd.to_numeric(df['stop_time'], errors='coerce') # Cleaned stop_time: seconds since midnight
+    dates = pd.to_datetime(df['stop_date'], errors='coerce')
+    features = {
+        'driver_gender': df['driver_gender'],
+        'age_band': (age // AGE_BAND * AGE_BAND).astype('Int64'),
+        'driver_race': df['driver_race'],
+        'country_name': df['country_name'],
+        'search_conducted': df['search_conducted'],
+        'drugs_related_stop': df['drugs_related_stop'],
+        'stop_duration': df['stop_duration'],
+        'stop_hour': (seconds // 3600).astype('Int64'),
+        'weekday': dates.dt.dayofweek.astype('Int64'), # Monday is 0
+    }
+    return pd.DataFrame({name: values.astype('string') for name, values in features.items()})
+
+def _text(value): # Empty form text is stored as NULL, which the dataset reads as 'Unknown'
+    return (str(value).strip() or 'Unknown') if value is not None else 'Unknown'
+
+# Feature values for one log from the form, formatted like model_features
+def log_features(stop_date, stop_time, country_name, driver_gender, driver_age, driver_race,
+                 search_conducted, drugs_related_stop, stop_duration):
+    return {
+        'driver_gender': _text(driver_gender),
+        'age_band': str(int(driver_age) // AGE_BAND * AGE_BAND),
+        'driver_race': _text(driver_race),
+        'country_name': _text(country_name),
+        'search_conducted': str(bool(search_conducted)),
+        'drugs_related_stop': str(bool(drugs_related_stop)),
+        'stop_duration': _text(stop_duration),
+        'stop_hour': str(stop_time.hour),
+        'weekday': str(stop_date.weekday()),
+    }
+
+# Class counts and per-feature value counts for each target, from a cleaned DataFrame
+def train_model(df, alpha=MODEL_ALPHA):
+    features = model_features(df)
+    targets = {}
+    for target in PREDICTION_TARGETS:
+        labels = df[target].astype('string')
+        known = labels.notna() & (labels != 'Unknown') # Logs from the form have no outcome or violation yet
+        labels, target_features = labels[known], features[known]
+        counts = {"classes": {str(cls): int(n) for cls, n in labels.value_counts().items()}, "features": {}}
+        for name in MODEL_FEATURES:
+            pairs = pd.DataFrame({'value': target_features[name], 'label': labels}).groupby(['value', 'label']).size() # Missing values are dropped
+            by_value = counts["features"].setdefault(name, {})
+            for (value, label), n in pairs.items():
+                by_value.setdefault(str(value), {})[str(label)] = int(n)
+        targets[target] = counts
+    trained_at = pd.Timestamp.now(tz='UTC')
+    return {
+        "format": MODEL_FORMAT,
+        "version": trained_at.strftime('%Y%m%d%H%M%S'), # Shown with every prediction
+        "trained_at": trained_at.isoformat(),
+        "rows": len(df),
+        "alpha": alpha,
+        "features": MODEL_FEATURES,
+        "targets": targets,
+    }
+
+# Log-probability tables for one target; the last row of each table (all zeros) is used for unseen or missing values
+def _compile_target(counts, alpha):
+    classes = sorted(counts["classes"])
+    class_counts = np.array([counts["classes"][cls] for cls in classes], dtype='float64')
+    tables = {}
+    for name, by_value in counts["features"].items():
+        values = sorted(by_value)
+        value_counts = np.array([[by_value[value].get(cls, 0) for cls in classes] for value in values], dtype='float64').reshape(len(values), len(classes))
+        totals = value_counts.sum(axis=0) # Stops per class with this feature present
+        table = np.log((value_counts + alpha) / (totals + alpha * max(len(values), 1)))
+        tables[name] = ({value: i for i, value in enumerate(values)}, np.vstack([table, np.zeros(len(classes))]))
+    log_prior = np.log((class_counts + alpha) / (class_counts.sum() + alpha * len(classes)))
+    return {"classes": classes, "log_prior": log_prior, "tables": tables}
+
+# Model ready for scoring: the artifact plus compiled log-probability tables
+def compile_model(artifact):
+    if artifact.get("format") != MODEL_FORMAT:
+        raise ValueError(f"Unsupported model artifact format: {artifact.get('format')} (expected {MODEL_FORMAT})")
+    return dict(artifact, compiled={target: _compile_target(counts, artifact["alpha"]) for target, counts in artifact["targets"].items()})
+
+def save_model(model, path=MODEL_PATH): # Write the artifact (counts only) as JSON
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    artifact = {key: value for key, value in model.items() if key != "compiled"}
+    with open(path, "w") as f:
+        json.dump(artifact, f)
+
+def load_model(path=MODEL_PATH):
+    with open(path) as f:
+        return compile_model(json.load(f))
+
+def _probabilities(scores): # Softmax over the last axis
+    scores = np.exp(scores - scores.max(axis=-1, keepdims=True))
+    return scores / scores.sum(axis=-1, keepdims=True)
+
+# Predict the stop outcome and violation for one log (a few dict lookups and array adds per target)
+def predict_log(model, stop_date, stop_time, country_name, driver_gender, driver_age, driver_race,
+                search_conducted, drugs_related_stop, stop_duration):
+    values = log_features(stop_date, stop_time, country_name, driver_gender, driver_age, driver_race,
+                          search_conducted, drugs_related_stop, stop_duration)
+    prediction = {"version": model["version"]}
+    for target, compiled in model["compiled"].items():
+        scores = compiled["log_prior"].copy()
+        for name, (index, table) in compiled["tables"].items():
+            scores += table[index.get(values[name], -1)]
+        probabilities = _probabilities(scores)
+        best = int(probabilities.argmax())
+        prediction[target] = compiled["classes"][best]
+        prediction[f"{target}_probability"] = float(probabilities[best])
+    return prediction
+
+# Predict every row of a cleaned DataFrame at once; returns predicted_<target> and <target>_probability columns
+def score_batch(model, df):
+    features = model_features(df)
+    result = pd.DataFrame(index=df.index)
+    for target, compiled in model["compiled"].items():
+        scores = np.tile(compiled["log_prior"], (len(df), 1))
+        for name, (index, table) in compiled["tables"].items():
+            scores += table[features[name].map(index).fillna(-1).astype('int64').to_numpy()]
+        probabilities = _probabilities(scores)
+        best = probabilities.argmax(axis=1)
+        result[f"predicted_{target}"] = np.array(compiled["classes"], dtype=object)[best]
+        result[f"{target}_probability"] = probabilities[np.arange(len(df)), best]
+    return result
+
+# Load and clean traffic_stops like the dashboard does
+def load_stops(db_url=DB_URL):
+    engine = create_engine(db_url)
+    query = f"select {', '.join(TABLE_COLUMNS)} from traffic_stops"
+    with engine.connect() as conn:
+        df = fetch_arrow_frame(conn, query) if arrow_available() else pd.read_sql(text(query), conn)
+    engine.dispose()
+    return clean_data(df)
+
+# Accuracy and latency of the model against the lookup index heuristic, trained on the earliest stop dates and
+# evaluated on the latest holdout_share of them
+def evaluation_report(df, holdout_share=HOLDOUT_SHARE, latency_samples=1000):
+    df = df.dropna(subset=['stop_date', 'stop_time'])
+    cutoff = df['stop_date'].quantile(1 - holdout_share)
+    train, test = df[df['stop_date'] < cutoff], df[df['stop_date'] >= cutoff]
+    start = time.perf_counter()
+    model = compile_model(train_model(train))
+    model_train_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    index = build_prediction_index(train)
+    index_train_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    scores = score_batch(model, test)
+    batch_ms = (time.perf_counter() - start) * 1000
+    heuristic = pd.DataFrame([predict_outcome(index, *row) for row in test[['driver_gender', 'driver_age', 'search_conducted', 'stop_duration', 'drugs_related_stop']].itertuples(index=False)],
+                             index=test.index)
+
+    sample = test.sample(min(latency_samples, len(test)), random_state=0)
+    model_us, index_us = [], []
+    for row in sample.itertuples(index=False):
+        stop_time = (pd.Timestamp(0) + pd.Timedelta(seconds=int(row.stop_time))).time()
+        start = time.perf_counter()
+        predict_log(model, row.stop_date, stop_time, row.country_name, row.driver_gender, row.driver_age, row.driver_race,
+                    row.search_conducted, row.drugs_related_stop, row.stop_duration)
+        model_us.append((time.perf_counter() - start) * 1e6)
+        start = time.perf_counter()
+        predict_outcome(index, row.driver_gender, row.driver_age, row.search_conducted, row.stop_duration, row.drugs_related_stop)
+        index_us.append((time.perf_counter() - start) * 1e6)
+
+    report = {"train_rows": len(train), "test_rows": len(test), "cutoff": str(cutoff.date()), "targets": {},
+              "latency_us": {"model_median": round(statistics.median(model_us), 1), "model_p99": round(float(np.percentile(model_us, 99)), 1),
+                             "index_median": round(statistics.median(index_us), 1), "index_p99": round(float(np.percentile(index_us, 99)), 1)},
+              "batch_rows_per_s": round(len(test) / max(batch_ms / 1000, 1e-9)),
+              "train_ms": {"model": round(model_train_ms, 1), "index": round(index_train_ms, 1)}}
+    for target in PREDICTION_TARGETS:
+        actual = test[target].astype('string')
+        known = actual != 'Unknown' # Stops without a recorded value are not scored
+        majority = train[target].astype('string').value_counts().idxmax()
+        report["targets"][target] = {
+            "model": round(float((scores.loc[known, f"predicted_{target}"] == actual[known]).mean()), 4),
+            "index": round(float((heuristic.loc[known, target] == actual[known]).mean()), 4),
+            "majority": round(float((actual[known] == majority).mean()), 4), # Always predicting the most common value
+        }
+    return report
+
+def print_report(report):
+    print(f"📊 Trained on {report['train_rows']:,} stops before {report['cutoff']}, evaluated on {report['test_rows']:,} later stops")
+    print(f"{'target':<14} {'model':>8} {'index':>8} {'majority':>9}")
+    for target, accuracy in report["targets"].items():
+        print(f"{target:<14} {accuracy['model']:>8.2%} {accuracy['index']:>8.2%} {accuracy['majority']:>9.2%}")
+    latency = report["latency_us"]
+    print(f"⏱️ Per log: model {latency['model_median']} µs (p99 {latency['model_p99']}), index {latency['index_median']} µs (p99 {latency['index_p99']})")
+    print(f"⏱️ Batch scoring: {report['batch_rows_per_s']:,} rows/s; training: model {report['train_ms']['model']} ms, index {report['train_ms']['index']} ms")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train, evaluate and batch-score the outcome and violation prediction model")
+    parser.add_argument("command", choices=["train", "report", "score"])
+    parser.add_argument("--model", default=MODEL_PATH, help="Model artifact path (written by train, read by score)")
+    parser.add_argument("--holdout", type=float, default=HOLDOUT_SHARE, help="With report: latest share of stop dates held out for evaluation")
+    parser.add_argument("--output", help="With report: write the report as JSON; with score: write the scores (.parquet or .csv)")
+    args = parser.parse_args(argv)
+    df = load_stops()
+    if args.command == "train":
+        model = train_model(df)
+        save_model(model, args.model)
+        print(f"✅ Trained model {model['version']} on {model['rows']:,} stops and saved it to {args.model}")
+    elif args.command == "report":
+        report = evaluation_report(df, args.holdout)
+        print_report(report)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+    elif args.command == "score":
+        if not args.output:
+            parser.error("score needs --output")
+        model = load_model(args.model)
+        start = time.perf_counter()
+        scores = pd.concat([df[['vehicle_number', 'stop_date', 'stop_time'] + PREDICTION_TARGETS], score_batch(model, df)], axis=1)
+        elapsed = time.perf_counter() - start
+        if args.output.endswith(".parquet"):
+            scores.to_parquet(args.output, index=False)
+        else:
+            scores.to_csv(args.output, index=False)
+        print(f"✅ Scored {len(scores):,} stops with model {model['version']} in {elapsed:.2f}s, written to {args.output}")
+
+if __name__ == "__main__":
+    sys.exit(main())
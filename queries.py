@@ -0,0 +1,234 @@
+# Canned SQL queries for the SecureCheck dashboard
+
+# Medium queries: map of dropdown label to SQL code
+medium_query_map = {"""🚗Vehicle-Based - 1.What are the top 10 vehicle_Number involved in drug-related stops?""": """
+select vehicle_number, count(*) as drug_stops_count -- Get vehicle number and number of drug-related stops
+from traffic_stops -- From the traffic stops table
+where drugs_related_stop = True -- Only include drug-related stops
+group by vehicle_number --Group results by vehicle number
+order by drug_stops_count desc -- Sort by number of stops, highest first
+limit 10  -- Show only the top 10 vehicles""",
+"""🚕Vehicle-Based - 2.Which vehicles were most frequently searched?""":"""
+select vehicle_number, count(*) as most_frequently_searched_count -- Get vehicle number and how many times it was searched  
+from traffic_stops -- From the traffic stops data 
+where search_conducted = true -- Only include records where a search was conducted 
+group by vehicle_number -- Group the data by vehicle number
+order by most_frequently_searched_count desc -- Sort by search count in descending order
+limit 10  -- Show only the top 10 vehicles""",
+"""🧍 Demographic-Based--3.Which driver age group had the highest arrest rate?""": 
+"""select driver_age, count(*) as total_stops, -- Select driver age and count how many stops happened for each age     
+sum(case when is_arrested = true then 1 else 0 end) as total_arrests, --Count how many of those stops led to an arrest    
+round(sum(case when is_arrested = true then 1 else 0 end)*1.0 / count(*),2) as arrest_rate -- Calculate arrest rate (arrests divided by total stops)
+from traffic_stops
+group by driver_age -- Group the data by driver age  
+order by arrest_rate desc -- Sort by arrest rate in descending order 
+limit 1 -- Show only the top result (age with highest arrest rate)""", 
+"""🧍 Demographic-Based--4.What is the gender distribution of drivers stopped in each country?""":
+"""select country_name, driver_gender, count(*) as total_stops from traffic_stops
+group by country_name, driver_gender
+order by country_name, driver_gender""", 
+"""🧍 Demographic-Based--5.Which race and gender combination has the highest search rate?""":
+"""select driver_race, driver_gender, 
+count(*) filter(where search_conducted)*100.0/count(*) as search_rate -- Calculate search rate: (number of searches ÷ total stops) × 100  
+from traffic_stops -- From the traffic stops data 
+group by driver_race, driver_gender -- Group the data by driver race and gender
+order by search_rate desc -- Sort the results by search rate in descending order 
+limit 5 -- Show only the top 5 combinations with the highest search rate""", 
+"""🕐Time & Duration Based--6.What time of day sees the most traffic stops?""":
+"""select extract(hour from stop_time) as Hour_of_the_day, -- Extract the hour from stop time and label it as hour_of_the_day  
+count(*) as most_traffic_stops -- Count how many traffic stops happened during that hour 
+from traffic_stops                               
+group by Hour_of_the_day -- Group the data by the extracted hour only 
+order by most_traffic_stops desc -- Sort the results by number of stops in descending order  
+limit 5 -- Show only the top 5 hours with the most traffic stops""",
+"""🕑Time & Duration Based - 7.What is the average stop duration for different violations?""":
+"""select violation, -- Select the type of violation
+round(avg(case -- Convert stop duration ranges to estimated minutes and calculate the average
+	when stop_duration ='0-5 Min' then 3
+	when stop_duration= '6-15 Min' then 10
+	when stop_duration ='16-30 Min' then 23
+	when stop_duration = '30+ Min' then 35
+	end),2)
+as average_stop_duration -- Round the average stop duration to 2 decimal places and label it as average_stop_duration  
+from traffic_stops where stop_duration is not null -- from traffic stops data - only include records where stop duration is not null
+group by violation -- Group the data by violation type 
+order by average_stop_duration desc -- Sort the results by average stop duration in descending order""",
+"""🕒Time & Duration Based 8.Are stops during the night more likely to lead to arrests?""":"""select 
+case 
+when extract(hour from stop_time) between 18 and 23 or extract(hour from stop_time) between 0 AND 5 then 'Night'
+else 'Day' -- Classify stops as Day or Night 
+end as hour_of_the_day,
+count(*) as total_stops, -- Count total stops per time period  
+round(count(*) filter (where is_arrested) *100.0 /count(*),2) as arrest_rate -- Calculate arrest rate percentage
+from traffic_stops
+where stop_time is not null -- Use only records with valid stop time 
+group by hour_of_the_day -- Group by time period 
+order by arrest_rate desc -- Sort by highest arrest rate""",
+"""🔫Violation-Based 9. Which violations are most associated with searches or arrests?""":
+"""select violation, -- Select type of violation 
+count(*) filter (where search_conducted) as most_searches, -- Count how many times a search was conducted for each violation 
+count(*) filter (where is_arrested) as most_arrests -- Count how many arrests happened for each violation 
+from traffic_stops -- From the traffic stops data 
+group by violation -- Group the data by violation type 
+order by most_searches desc, most_arrests desc -- Sort first by highest number of searches, then by arrests""",
+"""🔫Violation-Based 10. Which violations are most common among younger drivers (<25)?""":
+"""select violation, -- Select type of violation  
+count(*) as younger_drivers -- Count how many drivers under age 25 were involved  
+from traffic_stops where driver_age <25 -- From the traffic stops data (only where age < 25) 
+group by violation -- Group the data by violation type
+order by younger_drivers desc -- Sort by highest number of younger drivers""",
+"""🔫Violation-Based 11.Is there a violation that rarely results in search or arrest?""":"""select 
+  violation, -- Select type of violation  
+  count(*) as total_stops, -- Count total number of stops for each violation  
+  sum(case when search_conducted = true then 1 else 0 end) as total_searches, -- Count how many times a search was conducted 
+  sum(case when is_arrested = true then 1 else 0 end) as total_arrests, -- Count how many times an arrest occurred 
+  round(100.0 * sum(case when search_conducted = true then 1 else 0 end) / count(*), 2) as search_rate,-- Calculate search rate as a percentage of total stops
+  round(100.0 * sum(case when is_arrested = true then 1 else 0 end) / count(*), 2) as arrest_rate -- Calculate arrest rate as a percentage of total stops 
+from traffic_stops -- From the traffic stops data
+group by violation -- Group the data by violation type  
+order by search_rate asc, arrest_rate asc -- Sort by lowest search rate first, then by lowest arrest rate
+limit 5; -- Show only the top 5 violation that rarely results in search and arrest  
+""",
+"""🌏Location-Based 12.Which countries report the highest rate of drug-related stops?""":
+"""select country_name, -- Select the country name 
+round(count(*) filter(where drugs_related_stop) *100.0 / count(*),2) as highest_rate_of_drugrelated_stops -- Calculate the drug-related stop rate as a percentage 
+from traffic_stops -- From the traffic stops data  
+group by country_name -- Group the data by country 
+order by highest_rate_of_drugrelated_stops desc -- Sort by highest drug-related stop rate""",
+"""🌏Location-Based 13.What is the arrest rate by country and violation?""":"""select country_name, violation, -- Select country name and type of violation 
+round(count(*) filter(where is_arrested) *100.0 / count(*),2) as arrest_rate -- Calculate arrest rate as a percentage for each combination 
+from traffic_stops -- From the traffic stops data  
+group by country_name, violation -- Group the data by country and violation 
+order by arrest_rate asc -- Sort by lowest arrest rate first""",
+"""🌏Location-Based 14.Which country has the most stops with search conducted?""":
+"""select country_name, -- Select the country name 
+count(*) filter(where search_conducted) as search_count -- Count how many searches were conducted in each country
+from traffic_stops -- From the traffic stops data 
+group by country_name -- Group the data by country  
+order by search_count desc -- Sort by highest number of searches"""}
+
+# Advanced queries: map of dropdown label to SQL code
+advanced_query_map = {
+    "1.Yearly Breakdown of Stops and Arrests by Country (Using Subquery and Window Functions)": """
+    select country_name, -- Select country name
+year, -- Select year of the stop
+total_stops, -- Total stops that year in the country
+total_arrests, -- Total arrests that year in the country
+round(total_arrests*100.0/total_stops,2) as arrest_rate, -- Arrest rate percentage
+sum(total_arrests) over(partition by country_name order by year) as cummulative_arrest -- Window function: cumulative arrests over years by country
+from(
+select country_name, -- Subquery: select country name
+extract(year from stop_date) as year, -- Extract year from stop date
+count(*) as total_stops, -- Count total stops
+count (*) filter (where is_arrested) as total_arrests -- Count arrests
+from traffic_stops
+group by country_name, extract(year from stop_date) -- Group by country and year
+)as yearly_stats
+order by country_name, year  -- Order results by country and year
+    """,
+    """2.Driver Violation Trends Based on Age and Race (Join with Subquery)""":
+      """-- step 1: create a subquery that adds an age_group for each row
+with age_group_table as (
+select
+row_number() over() as row_id, -- Add row number as ID for joining
+case							-- Categorize driver_age into age groups
+when driver_age <18 then 'under 18'
+when driver_age between 18 and 25 then '18-25'
+when driver_age between 25 and 40 then '25-40'
+when driver_age between 40 and 60 then '40-60'
+else '60+'
+end as age_group
+from traffic_stops where driver_age is not null),
+
+traffic_stops_with_id as   -- step 2: add a row number to original table so we can join
+(
+select *, row_number() over() as row_id -- Add row number as ID for joining
+from traffic_stops where driver_age is not null and violation is not null and driver_race is not null
+)
+select  -- step 3: join both on row_id to combine original data with age group
+traffic_stops_with_id.violation,  -- Violation type
+traffic_stops_with_id.driver_race, -- Driver race
+age_group_table.age_group,  -- Age group from subquery
+count (*) as total_violations -- Count violations per group
+from traffic_stops_with_id
+join age_group_table on traffic_stops_with_id.row_id = age_group_table.row_id  -- Join both tables on row_id to match each driver with an age group
+group by traffic_stops_with_id.driver_race,age_group_table.age_group,traffic_stops_with_id.violation
+order by traffic_stops_with_id.driver_race,age_group_table.age_group,total_violations desc
+""", 
+"""3.Time Period Analysis of Stops (Joining with Date Functions) , Number of Stops by Year,Month, Hour of the Day""": """select 
+extract(year from stop_date) as Years_of_traffic_stops, -- Get year from stop_date
+extract(month from stop_date) as Month_number_of_Year, -- Get numeric month (1–12)
+to_char(stop_date,'month') as Month_of_Year, -- Get full month name
+extract(hour from stop_time) as Hour_of_the_day, -- Get hour (0–23) from stop_time
+date_trunc('hour',stop_time) as Hour_timestamp_of_the_Day, -- Truncate stop_time to start of hour
+count(*) as total_stops -- Count number of stops
+from traffic_stops
+group by Years_of_traffic_stops,  -- Group by extracted year
+Month_number_of_Year, -- Group by month number
+Month_of_Year, -- Group by month name
+Hour_of_the_day,  -- Group by hour
+Hour_timestamp_of_the_Day -- Group by hour timestamp
+order by Years_of_traffic_stops, -- Sort by year
+Month_number_of_Year,Month_of_Year, -- Then by month
+Hour_of_the_day,Hour_timestamp_of_the_Day asc -- Then by time of day""", """4.Violations with High Search and Arrest Rates (Window Function)""": """-- Step 1: Create a subquery to calculate search & arrest counts/rates by violation type
+with violation_type as (
+select violation, -- Violation type
+count(*) as total_stops, -- Total number of stops
+count(*) filter (where search_conducted=true) as total_search, -- Number of searches conducted
+count(*) filter (where is_arrested=true) as total_arrest, -- Number of arrests made
+round(count(*) filter (where search_conducted=true)*100.0/count(*),2) as search_rate, -- % of stops with search
+round(count(*) filter (where is_arrested=true)*100.0/count(*),2) as arrest_rate  -- % of stops with arrest
+from traffic_stops where violation is not null
+group by violation 
+),
+-- Step 2: Rank violations by search rate and arrest rate
+rank_violation as (
+select *,
+rank() over (order by search_rate desc) as search_rank, -- Rank violations by search rate (highest = 1)
+rank() over (order by arrest_rate desc) as arrest_rank -- Rank violations by arrest rate (highest = 1)
+from violation_type)
+-- Step 3: Select and display all data with ranks
+select
+violation, --Violation type
+total_stops, --total stops
+total_search, --total searches
+search_rate, --search rate(%)
+search_rank, --search rate rank
+total_arrest, --toral arrest
+arrest_rate, -- arrest rate(%)
+arrest_rank --aarrest rate rank
+from rank_violation
+order by (search_rank+arrest_rank) desc -- Sort by combined rank (higher total rank at bottom)
+""", """5.Driver Demographics by Country (Age, Gender, and Race)""": """-- Step 1: Create a subquery that assigns age groups and selects key driver info
+with age_group_table as (
+select country_name,  -- Country of the driver
+case 
+when driver_age <18 then 'under 18' -- Categorize driver_age into age groups
+when driver_age between 18 and 25 then '18-25'
+when driver_age between 25 and 40 then '25-40'
+when driver_age between 40 and 60 then '40-60'
+else '60+'
+end as age_group,
+driver_gender, -- Gender of the driver
+driver_race from traffic_stops -- Race of the driver
+where country_name is not null
+and driver_age is not null
+and driver_gender is not null
+and driver_race is not null
+)
+-- Step 2: Group the results by country, age group, and race, and count drivers
+select country_name,  -- Country of the driver
+age_group, -- Age group bucket
+driver_race, -- Driver race
+count(*) as total_drivers  -- Total drivers in this group
+from age_group_table
+group by country_name, age_group, driver_race
+order by country_name, age_group, driver_race -- Sort by country, then age group""", """6.Top 5 Violations with Highest Arrest Rates""": """select violation, -- Type of violation
+count(*) as total_stops, -- Total number of traffic stops for the violation
+count(*) filter (where is_arrested=true) as total_arrest, -- Number of arrests for the violation
+round (count(*) filter (where is_arrested=true)*100.0/count(*),2) as arrest_rate -- Arrest rate (%) for the violation
+from traffic_stops where violation is not null -- Consider only rows with a valid violation
+group by violation -- Group data by each violation type
+order by arrest_rate desc  -- Sort violations by highest arrest rate
+limit 5  -- Return top 5 violations with highest arrest rates
+"""}
@@ -0,0 +1,175 @@
+# Precomputed report bundles: every canned query plus the aggregates behind the key metrics and charts, run once
+# on parallel workers and written as zstd Parquet files with a JSON manifest. The dashboard opens a bundle in
+# snapshot mode (SECURECHECK_REPORT_BUNDLE) and never connects to the database.
+#
+# Usage:
+#   python reports.py generate                  # write reports/report_<version>/
+#   python reports.py generate --workers 8      # more parallel connections
+#   python reports.py list                      # bundles in the report directory, newest first
+#   python reports.py show latest               # manifest of a bundle (a path or "latest")
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from sqlalchemy import create_engine, text
+from config import DB_URL, REPORT_DIR, REPORT_WORKERS
+from instrumentation import QUERY_NAMES
+from rollups import ROLLUP_SQL, rollup_from_sql_result, rollup_metrics
+from timeseries import TIMESERIES_SQL, timeseries_from_sql_result
+from fetch import iter_arrow_batches, arrow_to_frame
+
+try: # Report bundles are optional (Parquet needs pyarrow)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+REPORT_FORMAT = 1 # Bundle layout version; bundles written with another layout are rejected on load
+MANIFEST_FILE = "manifest.json"
+BUNDLE_PREFIX = "report_" # Bundle directories are report_<version>, so names sort by age
+
+# Every result in a bundle by name: the canned queries (medium_1 ... advanced_6), the rollup behind the key metrics
+# and gender chart, and the hourly store behind the trend chart and heatmap
+REPORT_QUERIES = {name: query for query, name in QUERY_NAMES.items()}
+REPORT_QUERIES.update({"rollup": ROLLUP_SQL, "timeseries": TIMESERIES_SQL})
+
+# Data watermark, read in the same database snapshot as every result
+WATERMARK_SQL = """select count(*) as row_count,
+min(stop_date) as first_date, max(stop_date) as last_date,
+max(stop_date + stop_time) as last_stop, -- Latest stop in the bundle
+pg_current_snapshot()::text as db_snapshot, -- Transactions visible to every result (xmin:xmax:xip)
+now() as read_at
+from traffic_stops"""
+
+def reports_available():
+    return pq is not None
+
+def _json_value(value): # Dates and timestamps as ISO strings, NULL as None
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+# Run one query in the exported snapshot and write its result as a Parquet file; returns its manifest entry
+def _write_result(engine, snapshot_id, bundle_dir, name, query):
+    start = time.perf_counter()
+    with engine.connect().execution_options(isolation_level="REPEATABLE READ") as conn:
+        conn.execute(text(f"set transaction snapshot '{snapshot_id}'")) # Same data as the watermark and every other result
+        stats = {}
+        table = pa.Table.from_batches(list(iter_arrow_batches(conn, query, stats=stats)), schema=stats["schema"]) # COPY straight to Arrow
+        conn.rollback()
+    path = os.path.join(bundle_dir, f"{name}.parquet")
+    pq.write_table(table, path, compression='zstd')
+    return {
+        "file": f"{name}.parquet",
+        "sql": query, # Results are matched to queries by SQL text, so a changed query is never answered from an old bundle
+        "rows": table.num_rows,
+        "intervals": stats["intervals"], # Interval columns are stored as text and converted back on load
+        "bytes": os.path.getsize(path),
+        "query_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+# Run every report query on parallel connections that share one exported snapshot, then write the bundle.
+# Written to a hidden directory and renamed, so readers never see half a bundle. Returns the bundle path.
+def generate_report(engine, report_dir=REPORT_DIR, workers=REPORT_WORKERS):
+    if not reports_available():
+        raise SystemExit("❌ Report bundles need pyarrow: pip install pyarrow")
+    created_at = datetime.now(timezone.utc)
+    version = created_at.strftime('%Y%m%d%H%M%S')
+    bundle_dir = os.path.join(report_dir, f"{BUNDLE_PREFIX}{version}")
+    tmp_dir = os.path.join(report_dir, f".{BUNDLE_PREFIX}{version}.tmp")
+    os.makedirs(tmp_dir)
+    start = time.perf_counter()
+    try:
+        # The exported snapshot stays valid while this transaction is open
+        with engine.connect().execution_options(isolation_level="REPEATABLE READ") as conn:
+            snapshot_id = conn.execute(text("select pg_export_snapshot()")).scalar()
+            watermark = {key: _json_value(value) for key, value in conn.execute(text(WATERMARK_SQL)).mappings().one().items()}
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report") as pool:
+                futures = {name: pool.submit(_write_result, engine, snapshot_id, tmp_dir, name, query) for name, query in REPORT_QUERIES.items()}
+                results = {name: future.result() for name, future in futures.items()}
+            conn.rollback()
+        rollup_entry = results["rollup"]
+        rollup = rollup_from_sql_result(arrow_to_frame(pq.read_table(os.path.join(tmp_dir, rollup_entry["file"])), rollup_entry["intervals"]))
+        manifest = {
+            "format": REPORT_FORMAT,
+            "version": version,
+            "created_at": created_at.isoformat(),
+            "watermark": watermark,
+            "key_metrics": rollup_metrics(rollup), # Readable without opening the Parquet files
+            "workers": workers,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            "results": results,
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_dir, bundle_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return bundle_dir
+
+def list_bundles(report_dir=REPORT_DIR): # Bundle paths, newest first
+    if not os.path.isdir(report_dir):
+        return []
+    return [os.path.join(report_dir, name) for name in sorted(os.listdir(report_dir), reverse=True) if name.startswith(BUNDLE_PREFIX)]
+
+def resolve_bundle(path, report_dir=REPORT_DIR): # A bundle path, or "latest" for the newest bundle in the report directory
+    if path != "latest":
+        return path
+    bundles = list_bundles(report_dir)
+    if not bundles:
+        raise FileNotFoundError(f"No report bundles in {report_dir} (python reports.py generate)")
+    return bundles[0]
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != REPORT_FORMAT:
+        raise ValueError(f"Unsupported report bundle format {manifest.get('format')!r} (expected {REPORT_FORMAT}); generate a new bundle")
+    return manifest
+
+# Load a bundle for snapshot mode: {"path", "manifest", "queries": {SQL: result}, "rollup", "timeseries"}
+def load_bundle(path):
+    if not reports_available():
+        raise SystemExit("❌ Report bundles need pyarrow: pip install pyarrow")
+    manifest = read_manifest(path)
+    frames = {name: arrow_to_frame(pq.read_table(os.path.join(path, entry["file"])), entry["intervals"]) # Same types as the live Arrow fetch
+              for name, entry in manifest["results"].items()}
+    return {
+        "path": path,
+        "manifest": manifest,
+        "queries": {manifest["results"][name]["sql"]: frame for name, frame in frames.items()},
+        "rollup": rollup_from_sql_result(frames["rollup"]),
+        "timeseries": timeseries_from_sql_result(frames["timeseries"]),
+    }
+
+def print_manifest(manifest):
+    watermark = manifest["watermark"]
+    print(f"📦 Report {manifest['version']} (created {manifest['created_at']}, {manifest['elapsed_ms'] / 1000:.1f}s on {manifest['workers']} workers)")
+    print(f"   Data: {watermark['row_count']:,} stops, {watermark['first_date']} to {watermark['last_date']}, last stop {watermark['last_stop']}")
+    print(f"   Key metrics: {', '.join(f'{name} {value:,}' for name, value in manifest['key_metrics'].items())}")
+    for name, entry in manifest["results"].items():
+        print(f"   {name:<12} {entry['rows']:>9,} rows {entry['bytes'] / 1024:>9.1f} KB {entry['query_ms']:>9.1f} ms")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate and inspect precomputed report bundles for the dashboard's snapshot mode")
+    parser.add_argument("command", choices=["generate", "list", "show"])
+    parser.add_argument("bundle", nargs="?", default="latest", help="With show: bundle path or latest")
+    parser.add_argument("--report-dir", default=REPORT_DIR, help="Directory holding the bundles")
+    parser.add_argument("--workers", type=int, default=REPORT_WORKERS, help="With generate: parallel database connections")
+    args = parser.parse_args(argv)
+    if args.command == "generate":
+        path = generate_report(create_engine(DB_URL, pool_size=args.workers + 1), args.report_dir, args.workers) # One connection holds the snapshot
+        print(f"✅ Report bundle written to {path}")
+        print_manifest(read_manifest(path))
+    elif args.command == "list":
+        for path in list_bundles(args.report_dir):
+            manifest = read_manifest(path)
+            print(f"{path}  {manifest['watermark']['row_count']:,} stops, last stop {manifest['watermark']['last_stop']}")
+    elif args.command == "show":
+        print_manifest(read_manifest(resolve_bundle(args.bundle, args.report_dir)))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+# Pre-aggregated count tables (rollups) for the SecureCheck dashboard
+import numpy as np
+import pandas as pd
+from queries import medium_query_map, advanced_query_map
+from filters import CATEGORY_FILTER_COLUMNS
+
+# Rollup grain: one row per country x violation x hour x gender x race
+ROLLUP_DIMENSIONS = ['country_name', 'violation', 'stop_hour', 'driver_gender', 'driver_race']
+ROLLUP_MEASURES = ['stops', 'arrests', 'searches', 'drug_stops', 'arrest_outcomes', 'young_drivers']
+
+# One scan of traffic_stops that builds the full rollup (NULLs are kept as their own groups, like the canned SQL)
+ROLLUP_SQL = """select country_name, violation,
+cast(extract(hour from stop_time) as int) as stop_hour, -- Hour of the day (0-23)
+driver_gender, driver_race,
+count(*) as stops, -- Total stops
+count(*) filter (where is_arrested) as arrests, -- Stops where the driver was arrested
+count(*) filter (where search_conducted) as searches, -- Stops with a search
+count(*) filter (where drugs_related_stop) as drug_stops, -- Drug-related stops
+count(*) filter (where stop_outcome = 'Arrest') as arrest_outcomes, -- Stops with an 'Arrest' outcome
+count(*) filter (where driver_age < 25) as young_drivers -- Stops of drivers under 25
+from traffic_stops
+group by 1, 2, 3, 4, 5"""
+
+# Normalise a rollup frame: typed hour column, integer measures
+def _typed_rollup(rollup):
+    rollup = rollup.copy()
+    rollup['stop_hour'] = pd.to_numeric(rollup['stop_hour'], errors='coerce').astype('Int64') # Nullable int hour
+    for col in ROLLUP_MEASURES:
+        rollup[col] = pd.to_numeric(rollup[col], errors='coerce').fillna(0).astype('int64')
+    return rollup[ROLLUP_DIMENSIONS + ROLLUP_MEASURES]
+
+# Build a rollup from the result of ROLLUP_SQL
+def rollup_from_sql_result(result_df):
+    if result_df.empty: # Empty table or failed query
+        return pd.DataFrame({col: pd.Series(dtype='object') for col in ROLLUP_DIMENSIONS + ROLLUP_MEASURES}).pipe(_typed_rollup)
+    return _typed_rollup(result_df)
+
+# Build a rollup from raw traffic_stops rows (used for incremental updates with new logs)
+def rollup_from_rows(rows):
+    rows = rows.copy()
+    stop_time = pd.to_datetime(rows['stop_time'].astype('string'), format='mixed', errors='coerce') # Parse times like '14:05:00'
+    flags = lambda col: rows[col].astype('boolean').fillna(False) # NULL flags count as False, like count(*) filter
+    delta = pd.DataFrame({
+        'country_name': rows['country_name'],
+        'violation': rows['violation'],
+        'stop_hour': stop_time.dt.hour.astype('Int64'),
+        'driver_gender': rows['driver_gender'],
+        'driver_race': rows['driver_race'],
+        'stops': 1,
+        'arrests': flags('is_arrested').astype('int64'),
+        'searches': flags('search_conducted').astype('int64'),
+        'drug_stops': flags('drugs_related_stop').astype('int64'),
+        'arrest_outcomes': (rows['stop_outcome'] == 'Arrest').fillna(False).astype('int64'),
+        'young_drivers': (pd.to_numeric(rows['driver_age'], errors='coerce') < 25).fillna(False).astype('int64'), # NULL age is not under 25
+    })
+    return _typed_rollup(delta.groupby(ROLLUP_DIMENSIONS, dropna=False, as_index=False)[ROLLUP_MEASURES].sum())
+
+# Add a delta rollup into an existing rollup
+def merge_rollups(rollup, delta):
+    combined = pd.concat([rollup, delta], ignore_index=True)
+    return _typed_rollup(combined.groupby(ROLLUP_DIMENSIONS, dropna=False, as_index=False)[ROLLUP_MEASURES].sum())
+
+# Roll up to fewer dimensions
+def _by(rollup, dims):
+    return rollup.groupby(dims, dropna=False, as_index=False)[ROLLUP_MEASURES].sum()
+
+# Percentage rounded half away from zero to 2 decimals, like PostgreSQL round(numeric, 2); exact integer arithmetic on the counts,
+# so a rate that lands on a half hundredth is not pushed either way by float error
+def _rate(part, total):
+    part, total = part.astype('int64'), total.astype('int64')
+    return ((part * 20000 + total) // (total * 2)) / 100 # Hundredths of a percent, rounded half up
+
+# Rollup rows matching the category and hour band filters (see filters.rollup_can_filter), in O(groups)
+def filter_rollup(rollup, filters):
+    mask = pd.Series(True, index=rollup.index)
+    for col in CATEGORY_FILTER_COLUMNS:
+        if col in filters:
+            mask &= rollup[col].isin(filters[col])
+    if "hour_band" in filters: # NULL hours do not match, like extract(hour from stop_time) between ...
+        mask &= rollup['stop_hour'].between(*filters["hour_band"]).fillna(False).astype(bool)
+    return rollup[mask].reset_index(drop=True)
+
+# Key metrics (Total Stops, Arrests, Searches, Violation Types) in O(groups)
+def rollup_metrics(rollup):
+    return {
+        "Total Stops": int(rollup['stops'].sum()),
+        "Total Arrests": int(rollup['arrest_outcomes'].sum()),
+        "Total Searches": int(rollup['searches'].sum()),
+        "Violation Types": int(rollup.loc[rollup['stops'] > 0, 'violation'].fillna('Unknown').nunique()), # NULL counts as 'Unknown', like the cleaned dataset
+    }
+
+# Driver gender counts for the pie chart
+def rollup_gender_counts(rollup):
+    counts = _by(rollup, ['driver_gender'])
+    counts['driver_gender'] = counts['driver_gender'].fillna('Unknown')
+    counts = counts.groupby('driver_gender', as_index=False)['stops'].sum().sort_values('stops', ascending=False)
+    counts.columns = ['Gender', 'Count']
+    return counts.reset_index(drop=True)
+
+# --- Canned queries answered from the rollup (output matches the SQL in queries.py) ---
+
+def _gender_by_country(rollup): # Medium 4
+    result = _by(rollup, ['country_name', 'driver_gender']).rename(columns={'stops': 'total_stops'})
+    return result.sort_values(['country_name', 'driver_gender'])[['country_name', 'driver_gender', 'total_stops']]
+
+def _race_gender_search_rate(rollup): # Medium 5
+    result = _by(rollup, ['driver_race', 'driver_gender'])
+    result['search_rate'] = result['searches'] * 100.0 / result['stops']
+    return result.sort_values('search_rate', ascending=False).head(5)[['driver_race', 'driver_gender', 'search_rate']]
+
+def _busiest_hours(rollup): # Medium 6
+    result = _by(rollup, ['stop_hour']).rename(columns={'stop_hour': 'hour_of_the_day', 'stops': 'most_traffic_stops'})
+    return result.sort_values('most_traffic_stops', ascending=False).head(5)[['hour_of_the_day', 'most_traffic_stops']]
+
+def _night_arrest_rate(rollup): # Medium 8
+    timed = rollup[rollup['stop_hour'].notna()].copy() # where stop_time is not null
+    hour = timed['stop_hour'].astype(int)
+    timed['hour_of_the_day'] = np.where((hour >= 18) | (hour <= 5), 'Night', 'Day')
+    result = _by(timed, ['hour_of_the_day']).rename(columns={'stops': 'total_stops'})
+    result['arrest_rate'] = _rate(result['arrests'], result['total_stops'])
+    return result.sort_values('arrest_rate', ascending=False)[['hour_of_the_day', 'total_stops', 'arrest_rate']]
+
+def _violation_searches_arrests(rollup): # Medium 9
+    result = _by(rollup, ['violation']).rename(columns={'searches': 'most_searches', 'arrests': 'most_arrests'})
+    return result.sort_values(['most_searches', 'most_arrests'], ascending=False)[['violation', 'most_searches', 'most_arrests']]
+
+def _young_driver_violations(rollup): # Medium 10
+    result = _by(rollup, ['violation']).rename(columns={'young_drivers': 'younger_drivers'})
+    result = result[result['younger_drivers'] > 0] # where driver_age < 25 drops groups with no young drivers
+    return result.sort_values('younger_drivers', ascending=False)[['violation', 'younger_drivers']]
+
+def _rarely_searched_violations(rollup): # Medium 11
+    result = _by(rollup, ['violation']).rename(columns={'stops': 'total_stops', 'searches': 'total_searches', 'arrests': 'total_arrests'})
+    result['search_rate'] = _rate(result['total_searches'], result['total_stops'])
+    result['arrest_rate'] = _rate(result['total_arrests'], result['total_stops'])
+    result = result.sort_values(['search_rate', 'arrest_rate']).head(5)
+    return result[['violation', 'total_stops', 'total_searches', 'total_arrests', 'search_rate', 'arrest_rate']]
+
+def _country_drug_rate(rollup): # Medium 12
+    result = _by(rollup, ['country_name'])
+    result['highest_rate_of_drugrelated_stops'] = _rate(result['drug_stops'], result['stops'])
+    return result.sort_values('highest_rate_of_drugrelated_stops', ascending=False)[['country_name', 'highest_rate_of_drugrelated_stops']]
+
+def _country_violation_arrest_rate(rollup): # Medium 13
+    result = _by(rollup, ['country_name', 'violation'])
+    result['arrest_rate'] = _rate(result['arrests'], result['stops'])
+    return result.sort_values('arrest_rate')[['country_name', 'violation', 'arrest_rate']]
+
+def _country_search_count(rollup): # Medium 14
+    result = _by(rollup, ['country_name']).rename(columns={'searches': 'search_count'})
+    return result.sort_values('search_count', ascending=False)[['country_name', 'search_count']]
+
+def _violation_rate_ranks(rollup): # Advanced 4
+    result = _by(rollup[rollup['violation'].notna()], ['violation'])
+    result = result.rename(columns={'stops': 'total_stops', 'searches': 'total_search', 'arrests': 'total_arrest'})
+    result['search_rate'] = _rate(result['total_search'], result['total_stops'])
+    result['arrest_rate'] = _rate(result['total_arrest'], result['total_stops'])
+    result['search_rank'] = result['search_rate'].rank(method='min', ascending=False).astype(int) # rank() over (order by search_rate desc)
+    result['arrest_rank'] = result['arrest_rate'].rank(method='min', ascending=False).astype(int)
+    result = result.assign(combined_rank=result['search_rank'] + result['arrest_rank']).sort_values('combined_rank', ascending=False)
+    return result[['violation', 'total_stops', 'total_search', 'search_rate', 'search_rank', 'total_arrest', 'arrest_rate', 'arrest_rank']]
+
+def _top_arrest_rate_violations(rollup): # Advanced 6
+    result = _by(rollup[rollup['violation'].notna()], ['violation'])
+    result = result.rename(columns={'stops': 'total_stops', 'arrests': 'total_arrest'})
+    result['arrest_rate'] = _rate(result['total_arrest'], result['total_stops'])
+    return result.sort_values('arrest_rate', ascending=False).head(5)[['violation', 'total_stops', 'total_arrest', 'arrest_rate']]
+
+_medium = list(medium_query_map.values())
+_advanced = list(advanced_query_map.values())
+
+# Map of canned SQL text to the function that answers it from the rollup
+rollup_answers = {
+    _medium[3]: _gender_by_country,
+    _medium[4]: _race_gender_search_rate,
+    _medium[5]: _busiest_hours,
+    _medium[7]: _night_arrest_rate,
+    _medium[8]: _violation_searches_arrests,
+    _medium[9]: _young_driver_violations,
+    _medium[10]: _rarely_searched_violations,
+    _medium[11]: _country_drug_rate,
+    _medium[12]: _country_violation_arrest_rate,
+    _medium[13]: _country_search_count,
+    _advanced[3]: _violation_rate_ranks,
+    _advanced[5]: _top_arrest_rate_violations,
+}
+
+# Answer a canned query from the rollup, or return None if it needs the full table
+def answer_from_rollup(query, rollup):
+    answer = rollup_answers.get(query)
+    if answer is None or rollup is None:
+        return None
+    return answer(rollup).reset_index(drop=True)
@@ -0,0 +1,16 @@
+# Shared test setup: the modules live at the repository root (not a package), and the database tests are optional
+import os
+import sys
+import pytest
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Engine for the tests that compare with PostgreSQL; set SECURECHECK_TEST_DB_URL to a database with traffic_stops loaded.
+# Those tests only read, so they can point at the dashboard's own database.
+@pytest.fixture(scope="session")
+def db_engine():
+    url = os.environ.get("SECURECHECK_TEST_DB_URL")
+    if not url:
+        pytest.skip("SECURECHECK_TEST_DB_URL is not set")
+    return create_engine(url)
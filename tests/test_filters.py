@@ -0,0 +1,54 @@
+# Tests for filters.py: normalised filters, cache keys and the WHERE clause pushed into the canned queries
+import datetime
+import pytest
+from filters import AGE_LIMITS, HOUR_LIMITS, apply_filters, build_filter_conditions, filter_key, make_filters, rollup_can_filter
+
+# Inactive selections are dropped, so "no filter" is always the empty dict
+def test_make_filters_drops_inactive_filters():
+    filters = make_filters(date_range=(datetime.date(2024, 1, 1),), categories={'violation': []},
+                           age_range=AGE_LIMITS, hour_band=HOUR_LIMITS)
+    assert filters == {}
+
+def test_make_filters_normalises_values():
+    filters = make_filters(date_range=[datetime.date(2024, 1, 1), datetime.date(2024, 1, 31)],
+                           categories={'violation': ['Speeding', 'DUI']}, age_range=[18.0, 30.0], hour_band=(22, 23))
+    assert filters == {
+        "date_range": (datetime.date(2024, 1, 1), datetime.date(2024, 1, 31)),
+        "violation": ('DUI', 'Speeding'), # Sorted, so the selection order does not matter
+        "age_range": (18, 30),
+        "hour_band": (22, 23),
+    }
+
+def test_make_filters_rejects_unknown_columns():
+    with pytest.raises(ValueError, match="Unknown filter column"):
+        make_filters(categories={'vehicle_number': ['TN01']})
+
+# Equal selections give equal cache keys whatever order they were made in
+def test_filter_key_is_order_independent():
+    first = make_filters(categories={'violation': ['DUI', 'Speeding'], 'country_name': ['India']})
+    second = make_filters(categories={'country_name': ['India'], 'violation': ['Speeding', 'DUI']})
+    assert filter_key(first) == filter_key(second)
+    assert hash(filter_key(first)) == hash(filter_key(second))
+
+def test_rollup_can_filter_only_on_rollup_dimensions():
+    assert rollup_can_filter(make_filters(categories={'driver_race': ['Asian']}, hour_band=(0, 5)))
+    assert not rollup_can_filter(make_filters(age_range=(20, 30)))
+    assert not rollup_can_filter(make_filters(date_range=(datetime.date(2024, 1, 1), datetime.date(2024, 2, 1))))
+
+def test_build_filter_conditions_binds_every_value():
+    conditions, params = build_filter_conditions(make_filters(categories={'driver_gender': ['F']}, age_range=(20, 30)))
+    assert conditions == ["driver_gender = any(:f_driver_gender)", "driver_age between :age_min and :age_max"]
+    assert params == {"f_driver_gender": ['F'], "age_min": 20, "age_max": 30}
+
+def test_apply_filters_without_filters_leaves_the_query_alone():
+    query = "select count(*) from traffic_stops"
+    assert apply_filters(query, {}) == (query, {})
+
+# Every scan of traffic_stops (including subqueries) reads the filtered rows, other tables are untouched
+def test_apply_filters_rewrites_every_scan():
+    query = "select * FROM traffic_stops t join (select 1 from traffic_stops) s on true join traffic_stops_archive a on true"
+    filtered, params = apply_filters(query, make_filters(hour_band=(6, 9)))
+    subquery = "from (select * from traffic_stops where extract(hour from stop_time) between :hour_min and :hour_max) as traffic_stops"
+    assert filtered.count(subquery) == 2
+    assert "join traffic_stops_archive a" in filtered
+    assert params == {"hour_min": 6, "hour_max": 9}
@@ -0,0 +1,50 @@
+# Tests for ingest.py: chunked reading and resuming from a checkpoint
+import pandas as pd
+import pytest
+from cleaning import TABLE_COLUMNS
+from ingest import prepare_chunk, read_chunks
+
+@pytest.fixture
+def stops_frame():
+    return pd.DataFrame({'stop_date': [f"2024-01-{day:02d}" for day in range(1, 11)], 'vehicle_number': [f"TN{i:04d}" for i in range(10)]})
+
+@pytest.fixture(params=['csv', 'parquet'])
+def stops_file(request, tmp_path, stops_frame):
+    path = tmp_path / f"stops.{request.param}"
+    if request.param == 'csv':
+        stops_frame.to_csv(path, index=False)
+    else:
+        pytest.importorskip("pyarrow")
+        stops_frame.to_parquet(path, index=False, row_group_size=4) # Row groups that do not line up with the chunks
+    return path, request.param
+
+def loaded_vehicles(path, file_format, chunk_size, skip_rows=0):
+    chunks = list(read_chunks(str(path), file_format, chunk_size, skip_rows))
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    return [vehicle for chunk in chunks for vehicle in chunk['vehicle_number']]
+
+def test_read_chunks_reads_every_row_once(stops_file, stops_frame):
+    path, file_format = stops_file
+    assert loaded_vehicles(path, file_format, 3) == list(stops_frame['vehicle_number'])
+
+# Resuming after a checkpoint continues with the first row that was not loaded, wherever it falls in a chunk
+@pytest.mark.parametrize("skip_rows", [1, 3, 4, 9, 10])
+def test_read_chunks_resumes_after_the_checkpoint(stops_file, stops_frame, skip_rows):
+    path, file_format = stops_file
+    assert loaded_vehicles(path, file_format, 3, skip_rows) == list(stops_frame['vehicle_number'][skip_rows:])
+
+# The CSV header is never skipped, so a resumed chunk still has named columns
+def test_resumed_csv_chunks_keep_the_header(tmp_path, stops_frame):
+    path = tmp_path / "stops.csv"
+    stops_frame.to_csv(path, index=False)
+    first = next(read_chunks(str(path), 'csv', 3, 5))
+    assert list(first.columns) == ['stop_date', 'vehicle_number']
+    assert first['stop_date'].iloc[0] == "2024-01-06"
+
+def test_prepare_chunk_formats_values_for_copy():
+    chunk = prepare_chunk(pd.DataFrame({'stop_date': ['2024-01-05', 'not a date'], 'stop_time': ['9:05', None],
+                                        'is_arrested': [True, None], 'extra': [1, 2]}))
+    assert list(chunk.columns) == TABLE_COLUMNS
+    assert chunk['stop_date'].iloc[0] == '2024-01-05' and pd.isna(chunk['stop_date'].iloc[1])
+    assert chunk['stop_time'].iloc[0] == '09:05:00'
+    assert list(chunk['is_arrested']) == ['t', 'f']
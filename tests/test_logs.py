@@ -0,0 +1,52 @@
+# Tests for logs.py: form validation and the idempotent multi-row insert
+import datetime
+import pytest
+from logs import LOG_COLUMNS, build_insert_batch, make_police_log
+
+def make_log(**overrides):
+    values = dict(stop_date=datetime.date(2024, 5, 1), stop_time=datetime.time(10, 30, 45), country_name=" India ",
+                  driver_gender="M", driver_age=30, driver_race="Asian", search_conducted=False, search_type="Frisk",
+                  drugs_related_stop=False, stop_duration="0-5 Min", vehicle_number=" tn01ab1234 ")
+    values.update(overrides)
+    return make_police_log(**values)
+
+def test_make_police_log_normalises_form_values():
+    log = make_log()
+    assert log.vehicle_number == "TN01AB1234"
+    assert log.country_name == "India"
+    assert log.stop_time == datetime.time(10, 30) # Minute precision, like the form
+    assert log.search_type is None # No search, so no search type
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"vehicle_number": "  "}, "Vehicle Number"),
+    ({"country_name": ""}, "Country Name"),
+    ({"driver_gender": "X"}, "Driver Gender"),
+    ({"stop_duration": "1 hour"}, "Stop Duration"),
+    ({"driver_age": 12}, "Driver Age"),
+])
+def test_make_police_log_rejects_invalid_values(overrides, message):
+    with pytest.raises(ValueError, match=message):
+        make_log(**overrides)
+
+# Resubmitting the same stop gives the same dedup key, whatever the seconds or spacing on the form
+def test_repeat_submissions_share_a_log_key():
+    first = make_log()
+    repeat = make_log(stop_time=datetime.time(10, 30, 5), vehicle_number="TN01AB1234", driver_age=31)
+    assert first.key == repeat.key
+    assert first.log_key == repeat.log_key == "TN01AB1234|2024-05-01|10:30:00"
+    assert make_log(stop_time=datetime.time(10, 31)).log_key != first.log_key
+
+def test_build_insert_batch_binds_one_row_per_log():
+    logs = [make_log(), make_log(vehicle_number="KA05XY9876", search_conducted=True)]
+    query, params = build_insert_batch(logs)
+    assert query.count("cast(:stop_date_") == 2
+    assert params["vehicle_number_1"] == "KA05XY9876"
+    assert params["search_type_1"] == "Frisk"
+    assert params["log_key_0"] == logs[0].log_key
+    assert set(params) == {f"{col}_{i}" for col in LOG_COLUMNS + ["log_key"] for i in range(2)}
+
+# The conflict target is named, so a missing unique index fails the insert instead of letting duplicates through
+def test_build_insert_batch_skips_only_log_key_conflicts():
+    query, _ = build_insert_batch([make_log()])
+    assert "on conflict (log_key, stop_date) do nothing" in query
+    assert query.rstrip().endswith(f"returning {', '.join(LOG_COLUMNS)}")
@@ -0,0 +1,62 @@
+# Tests for pagination.py: keyset page queries and cursors
+import datetime
+import pandas as pd
+import pytest
+from filters import make_filters
+from pagination import build_page_query, escape_like, split_page
+
+def test_first_page_reads_both_branches_without_a_cursor():
+    query, params = build_page_query('driver_age', False, None, 25)
+    assert "driver_age is not null" in query and "driver_age is null" in query
+    assert "cursor" not in query
+    assert "order by row_branch, driver_age asc, row_id asc" in query
+    assert params == {"page_limit": 26} # One extra row to detect a next page
+
+def test_cursor_continues_the_value_branch():
+    query, params = build_page_query('stop_date', True, (datetime.date(2024, 1, 5), 42), 50)
+    assert "(stop_date, id) < (:cursor_value, :cursor_id)" in query # Descending
+    assert "order by stop_date desc, id desc" in query
+    assert "id < :cursor_id\n" not in query # NULL rows all come after any non-NULL cursor
+    assert params["cursor_value"] == datetime.date(2024, 1, 5)
+    assert params["cursor_id"] == 42
+
+# Once the cursor is in the NULL rows only that branch is left, paged by id
+def test_null_cursor_reads_only_the_null_branch():
+    query, params = build_page_query('driver_race', False, (None, 7), 25)
+    assert "is not null" not in query
+    assert "union all" not in query
+    assert "driver_race is null and id > :cursor_id" in query
+    assert "cursor_value" not in params
+
+def test_filters_and_search_apply_to_both_branches():
+    query, params = build_page_query('violation', False, None, 25, make_filters(categories={'country_name': ['India']}), "tn_01%")
+    assert query.count("country_name = any(:f_country_name)") == 2
+    assert query.count("vehicle_number ilike :vehicle_search escape '\\'") == 2
+    assert params["vehicle_search"] == "%tn\\_01\\%%"
+
+def test_escape_like_matches_wildcards_literally():
+    assert escape_like("a_b%c\\d") == "a\\_b\\%c\\\\d"
+
+def test_unknown_sort_column_is_rejected():
+    with pytest.raises(ValueError, match="Unknown sort column"):
+        build_page_query('id; drop table traffic_stops', False, None, 25)
+
+def page_frame(values):
+    return pd.DataFrame({"row_branch": [0 if value is not None else 1 for value in values],
+                         "row_id": range(1, len(values) + 1), "driver_age": values})
+
+def test_split_page_returns_the_cursor_of_the_last_visible_row():
+    rows, cursor, has_next = split_page(page_frame([20, 21, 22]), 'driver_age', 2)
+    assert list(rows.columns) == ['driver_age']
+    assert len(rows) == 2 and has_next
+    assert cursor == (21, 2) and type(cursor[0]) is int # Plain Python values for the driver
+
+def test_split_page_cursor_in_the_null_rows():
+    _, cursor, has_next = split_page(page_frame([30, None, None]), 'driver_age', 2)
+    assert has_next and cursor == (None, 2)
+
+def test_split_page_last_page_has_no_cursor():
+    rows, cursor, has_next = split_page(page_frame([20]), 'driver_age', 2)
+    assert len(rows) == 1 and cursor is None and not has_next
+    rows, cursor, has_next = split_page(pd.DataFrame(), 'driver_age', 2)
+    assert rows.empty and cursor is None and not has_next
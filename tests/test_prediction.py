@@ -0,0 +1,65 @@
+# Tests for prediction.py: the back-off lookup index behind the "Predict Outcome and Violation" form
+import pandas as pd
+from prediction import DEFAULT_PREDICTION, build_prediction_index, new_prediction_index, predict_outcome, update_prediction_index
+
+def stops(*rows):
+    columns = ['driver_gender', 'driver_age', 'search_conducted', 'stop_duration', 'drugs_related_stop', 'stop_outcome', 'violation']
+    return pd.DataFrame(list(rows), columns=columns)
+
+HISTORY = stops(
+    ('M', 30, False, '0-5 Min', False, 'Warning', 'Speeding'),
+    ('M', 30, False, '0-5 Min', False, 'Ticket', 'Speeding'),
+    ('M', 30, False, '0-5 Min', False, 'Ticket', 'Seatbelt'),
+    ('F', 45, True, '16-30 Min', True, 'Arrest', 'DUI'),
+)
+
+def test_exact_match_predicts_the_most_common_values():
+    prediction = predict_outcome(build_prediction_index(HISTORY), 'M', 30, False, '0-5 Min', False)
+    assert prediction["stop_outcome"] == 'Ticket'
+    assert prediction["violation"] == 'Speeding'
+    assert prediction["matches"] == 3
+    assert len(prediction["matched_on"]) == 5
+
+# Ties go to the alphabetically first value, like Series.mode()[0]
+def test_ties_go_to_the_first_value():
+    prediction = predict_outcome(build_prediction_index(HISTORY.head(2)), 'M', 30, False, '0-5 Min', False)
+    assert prediction["stop_outcome"] == 'Ticket'
+
+def test_backs_off_to_fewer_keys():
+    prediction = predict_outcome(build_prediction_index(HISTORY), 'M', 31, False, '6-15 Min', False)
+    assert prediction["matched_on"] == ['driver_gender', 'search_conducted', 'drugs_related_stop']
+    assert prediction["matches"] == 3
+
+def test_empty_index_gives_the_default():
+    prediction = predict_outcome(new_prediction_index(), 'F', 20, False, '0-5 Min', False)
+    assert prediction == dict(DEFAULT_PREDICTION, matches=0, matched_on=[])
+
+# Adding rows one batch at a time gives the same index as one build over all of them
+def test_incremental_updates_match_a_full_build():
+    index = new_prediction_index()
+    for start in range(len(HISTORY)):
+        update_prediction_index(index, HISTORY.iloc[start:start + 1])
+    assert index == build_prediction_index(HISTORY)
+
+# Form logs have no outcome or violation yet ('Unknown' after cleaning): they must not outvote recorded stops
+def test_unknown_targets_are_not_counted():
+    index = build_prediction_index(HISTORY)
+    update_prediction_index(index, stops(*[('M', 30, False, '0-5 Min', False, 'Unknown', 'Unknown')] * 5,
+                                         ('M', 30, False, '0-5 Min', False, None, 'Speeding')))
+    prediction = predict_outcome(index, 'M', 30, False, '0-5 Min', False)
+    assert prediction["stop_outcome"] == 'Ticket'
+    assert prediction["violation"] == 'Speeding'
+    assert prediction["matches"] == 3 # Stops with a known outcome
+    assert index["levels"][0][('M', 30, False, '0-5 Min', False)]["violation"] == {'Speeding': 3, 'Seatbelt': 1}
+
+# A key seen only with unknown targets backs off instead of predicting from nothing
+def test_key_with_only_unknown_targets_backs_off():
+    index = build_prediction_index(HISTORY)
+    update_prediction_index(index, stops(('F', 22, False, '0-5 Min', False, 'Unknown', 'Unknown')))
+    prediction = predict_outcome(index, 'F', 22, False, '0-5 Min', False)
+    assert prediction["matched_on"] == ['search_conducted', 'drugs_related_stop']
+    assert prediction["stop_outcome"] == 'Ticket'
+
+def test_frames_without_the_index_columns_are_ignored():
+    index = new_prediction_index()
+    assert update_prediction_index(index, pd.DataFrame({'driver_gender': ['M']})) == new_prediction_index()
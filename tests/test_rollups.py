@@ -0,0 +1,74 @@
+# Tests for rollups.py: the rollup answers must return the same rows as the canned SQL they replace
+import re
+import pandas as pd
+import pytest
+from sqlalchemy import text
+from benchmark import generate_stops
+from columnar import columnar_available, results_match, run_snapshot_query
+from filters import make_filters
+from rollups import (ROLLUP_DIMENSIONS, ROLLUP_SQL, _rate, answer_from_rollup, filter_rollup, merge_rollups,
+                     rollup_answers, rollup_from_rows, rollup_from_sql_result, rollup_metrics)
+
+@pytest.fixture(scope="module")
+def stops():
+    return pd.concat(generate_stops(3000, seed=7), ignore_index=True) # Includes NULLs in the rollup dimensions
+
+# The canned SQL run on DuckDB over the same rows, as a reference that needs no server (see columnar.py)
+@pytest.fixture(scope="module")
+def duckdb_stops(stops):
+    if not columnar_available():
+        pytest.skip("duckdb is not installed")
+    import duckdb
+    conn = duckdb.connect()
+    conn.register("stops_frame", stops)
+    conn.execute("""create table traffic_stops as select * replace (cast(stop_date as date) as stop_date,
+cast(stop_time as time) as stop_time, cast(driver_age as smallint) as driver_age) from stops_frame""")
+    return conn
+
+def sorted_rollup(rollup):
+    return rollup.sort_values(ROLLUP_DIMENSIONS, ignore_index=True, na_position='first')
+
+def is_limited(query):
+    return re.search(r"\blimit\s+\d+", query, flags=re.IGNORECASE) is not None
+
+# Rounded half away from zero, like PostgreSQL round(numeric, 2), including values a float formula gets wrong
+@pytest.mark.parametrize("part, total, rate", [(1, 8, 12.5), (1, 32, 3.13), (1, 64, 1.56), (7, 8000, 0.09), (1, 3, 33.33), (2, 3, 66.67), (0, 5, 0.0), (5, 5, 100.0)])
+def test_rate_rounds_like_postgres(part, total, rate):
+    assert _rate(pd.Series([part]), pd.Series([total])).tolist() == [rate]
+
+# Rows folded in one batch at a time (the log writer path) give the same rollup as one build
+def test_merged_rollup_matches_a_full_build(stops):
+    rollup = rollup_from_rows(stops.iloc[:1000])
+    for start in range(1000, len(stops), 700):
+        rollup = merge_rollups(rollup, rollup_from_rows(stops.iloc[start:start + 700]))
+    pd.testing.assert_frame_equal(sorted_rollup(rollup), sorted_rollup(rollup_from_rows(stops)))
+
+def test_rollup_metrics_count_every_stop(stops):
+    metrics = rollup_metrics(rollup_from_rows(stops))
+    assert metrics["Total Stops"] == len(stops)
+    assert metrics["Total Searches"] == int(stops['search_conducted'].sum())
+    assert metrics["Total Arrests"] == int((stops['stop_outcome'] == 'Arrest').sum())
+
+def test_filter_rollup_matches_filtering_the_rows(stops):
+    filters = make_filters(categories={'violation': ['DUI', 'Speeding']}, hour_band=(18, 23))
+    hours = pd.to_datetime(stops['stop_time'], format='%H:%M:%S').dt.hour
+    expected = stops[stops['violation'].isin(['DUI', 'Speeding']) & hours.between(18, 23)]
+    assert int(filter_rollup(rollup_from_rows(stops), filters)['stops'].sum()) == len(expected)
+
+# ROLLUP_SQL and the incremental path (rollup_from_rows) build the same table
+def test_rollup_sql_matches_rollup_from_rows(stops, duckdb_stops):
+    from_sql = rollup_from_sql_result(run_snapshot_query(duckdb_stops, ROLLUP_SQL))
+    pd.testing.assert_frame_equal(sorted_rollup(from_sql), sorted_rollup(rollup_from_rows(stops)))
+
+@pytest.mark.parametrize("query", list(rollup_answers), ids=[answer.__name__ for answer in rollup_answers.values()])
+def test_rollup_answers_match_the_canned_sql(query, stops, duckdb_stops):
+    expected = run_snapshot_query(duckdb_stops, query)
+    assert results_match(expected, answer_from_rollup(query, rollup_from_rows(stops)), is_limited(query))
+
+# Same check against PostgreSQL itself, on the data in the configured database (read only)
+@pytest.mark.parametrize("query", list(rollup_answers), ids=[answer.__name__ for answer in rollup_answers.values()])
+def test_rollup_answers_match_postgres(query, db_engine):
+    with db_engine.connect() as conn:
+        rollup = rollup_from_sql_result(pd.read_sql(text(ROLLUP_SQL), conn))
+        expected = pd.read_sql(text(query), conn)
+    assert results_match(expected, answer_from_rollup(query, rollup), is_limited(query))
@@ -0,0 +1,168 @@
+# Time-series rollups for the SecureCheck dashboard: stops, arrests, searches and drug stops per country and
+# violation at hourly, daily and monthly grain, for the trend chart, the hour x weekday heatmap and advanced query 3
+import calendar
+import math
+import pandas as pd
+from queries import advanced_query_map
+
+# Store grain: one row per stop date x hour x country x violation; daily and monthly are kept alongside
+TIMESERIES_DIMENSIONS = ['stop_date', 'stop_hour', 'country_name', 'violation']
+TIMESERIES_MEASURES = ['stops', 'arrests', 'searches', 'drug_stops']
+PERIOD_DIMENSIONS = ['period', 'country_name', 'violation'] # Daily and monthly grain
+TIMESERIES_FILTERS = {'date_range', 'country_name', 'violation', 'hour_band'} # Global filters the store answers without a scan
+GRAIN_FREQUENCIES = {"hourly": "h", "daily": "D", "monthly": "MS"} # Finest first
+GRAIN_UNITS = {"hourly": "hour", "daily": "day", "monthly": "month"}
+MAX_CHART_POINTS = 2000 # Most points sent to Plotly per chart; wider buckets are used above this
+WEEKDAYS = list(calendar.day_name) # Monday first, like Series.dt.dayofweek
+
+# One scan of traffic_stops that builds the hourly store (NULL dates and hours are kept as their own groups)
+TIMESERIES_SQL = """select stop_date,
+cast(extract(hour from stop_time) as int) as stop_hour, -- Hour of the day (0-23)
+country_name, violation,
+count(*) as stops, -- Total stops
+count(*) filter (where is_arrested) as arrests, -- Stops where the driver was arrested
+count(*) filter (where search_conducted) as searches, -- Stops with a search
+count(*) filter (where drugs_related_stop) as drug_stops -- Drug-related stops
+from traffic_stops
+group by 1, 2, 3, 4"""
+
+# Normalise an hourly frame: datetime dates, nullable int hours, integer measures
+def _typed_hourly(hourly):
+    hourly = hourly.copy()
+    hourly['stop_date'] = pd.to_datetime(hourly['stop_date'], errors='coerce')
+    hourly['stop_hour'] = pd.to_numeric(hourly['stop_hour'], errors='coerce').astype('Int64')
+    for col in TIMESERIES_MEASURES:
+        hourly[col] = pd.to_numeric(hourly[col], errors='coerce').fillna(0).astype('int64')
+    return hourly[TIMESERIES_DIMENSIONS + TIMESERIES_MEASURES]
+
+# Sum an hourly frame into daily or monthly periods
+def _by_period(hourly, grain):
+    period = hourly['stop_date'] if grain == "daily" else hourly['stop_date'].dt.to_period('M').dt.to_timestamp()
+    return hourly.assign(period=period).groupby(PERIOD_DIMENSIONS, dropna=False, as_index=False)[TIMESERIES_MEASURES].sum()
+
+# Store with all three grains from an hourly frame
+def build_timeseries(hourly):
+    hourly = _typed_hourly(hourly)
+    return {"hourly": hourly, "daily": _by_period(hourly, "daily"), "monthly": _by_period(hourly, "monthly")}
+
+# Build the store from the result of TIMESERIES_SQL
+def timeseries_from_sql_result(result_df):
+    if result_df.empty: # Empty table or failed query
+        result_df = pd.DataFrame({col: pd.Series(dtype='object') for col in TIMESERIES_DIMENSIONS + TIMESERIES_MEASURES})
+    return build_timeseries(result_df)
+
+# Hourly delta from raw traffic_stops rows (used for incremental updates with new logs)
+def timeseries_from_rows(rows):
+    stop_time = pd.to_datetime(rows['stop_time'].astype('string'), format='mixed', errors='coerce') # Parse times like '14:05:00'
+    flags = lambda col: rows[col].astype('boolean').fillna(False).astype('int64') # NULL flags count as False, like count(*) filter
+    delta = pd.DataFrame({
+        'stop_date': pd.to_datetime(rows['stop_date'], errors='coerce'),
+        'stop_hour': stop_time.dt.hour.astype('Int64'),
+        'country_name': rows['country_name'],
+        'violation': rows['violation'],
+        'stops': 1,
+        'arrests': flags('is_arrested'),
+        'searches': flags('search_conducted'),
+        'drug_stops': flags('drugs_related_stop'),
+    })
+    return _typed_hourly(delta.groupby(TIMESERIES_DIMENSIONS, dropna=False, as_index=False)[TIMESERIES_MEASURES].sum())
+
+# Add an hourly delta into every grain of the store
+def merge_timeseries(store, delta):
+    hourly = pd.concat([store["hourly"], delta], ignore_index=True)
+    merged = {"hourly": _typed_hourly(hourly.groupby(TIMESERIES_DIMENSIONS, dropna=False, as_index=False)[TIMESERIES_MEASURES].sum())}
+    for grain in ("daily", "monthly"):
+        combined = pd.concat([store[grain], _by_period(delta, grain)], ignore_index=True)
+        merged[grain] = combined.groupby(PERIOD_DIMENSIONS, dropna=False, as_index=False)[TIMESERIES_MEASURES].sum()
+    return merged
+
+# True if the filters only use store dimensions, so they can be applied without a scan
+def timeseries_can_filter(filters):
+    return set(filters) <= TIMESERIES_FILTERS
+
+def _category_mask(frame, filters):
+    mask = pd.Series(True, index=frame.index)
+    for col in ('country_name', 'violation'):
+        if col in filters:
+            mask &= frame[col].isin(filters[col])
+    return mask
+
+# Store rows matching the date range, country, violation and hour band filters
+def filter_timeseries(store, filters):
+    if "date_range" not in filters and "hour_band" not in filters: # Every grain has the country and violation columns
+        return {grain: frame[_category_mask(frame, filters)].reset_index(drop=True) for grain, frame in store.items()}
+    hourly = store["hourly"]
+    mask = _category_mask(hourly, filters)
+    if "date_range" in filters: # Partial months and days need the hourly grain
+        mask &= hourly['stop_date'].between(pd.Timestamp(filters["date_range"][0]), pd.Timestamp(filters["date_range"][1]))
+    if "hour_band" in filters: # NULL hours do not match, like extract(hour from stop_time) between ...
+        mask &= hourly['stop_hour'].between(*filters["hour_band"]).fillna(False).astype(bool)
+    return build_timeseries(hourly[mask])
+
+# Time column for a grain (hourly rows get the start of their hour); rows without a date or hour are dropped
+def _periods(store, grain):
+    if grain != "hourly":
+        return store[grain].dropna(subset=['period'])
+    hourly = store["hourly"].dropna(subset=['stop_date', 'stop_hour'])
+    return hourly.assign(period=hourly['stop_date'] + pd.to_timedelta(hourly['stop_hour'].astype('int64'), unit='h'))
+
+# Trend of one measure per country at the finest grain that fits in max_points, with empty periods as 0.
+# Returns (frame with period, country_name and the measure, label of the bucket size).
+def trend_series(store, measure, max_points=MAX_CHART_POINTS):
+    for grain, freq in GRAIN_FREQUENCIES.items():
+        frame = _periods(store, grain)
+        if frame.empty:
+            return pd.DataFrame(columns=['period', 'country_name', measure]), grain
+        frame = frame.assign(country_name=frame['country_name'].fillna('Unknown'))
+        periods = pd.date_range(frame['period'].min(), frame['period'].max(), freq=freq)
+        series_count = frame['country_name'].nunique()
+        if len(periods) * series_count <= max_points:
+            break
+    wide = frame.pivot_table(index='period', columns='country_name', values=measure, aggfunc='sum', fill_value=0)
+    wide = wide.reindex(periods, fill_value=0) # Periods without stops count as 0
+    width = math.ceil(len(periods) * series_count / max_points)
+    label = grain
+    if width > 1: # Still too many points (very long ranges): sum neighbouring periods into wider buckets
+        buckets = [i // width for i in range(len(wide))]
+        wide = wide.groupby(buckets).sum().set_axis(wide.index[::width])
+        label = f"{width}-{GRAIN_UNITS[grain]} buckets"
+    result = wide.rename_axis(index='period', columns='country_name').stack().rename(measure).reset_index()
+    return result, label
+
+# Hour of day x weekday totals of one measure (7 x 24, weekdays from Monday)
+def weekday_hour_matrix(store, measure):
+    hourly = store["hourly"].dropna(subset=['stop_date', 'stop_hour'])
+    matrix = hourly.assign(weekday=hourly['stop_date'].dt.dayofweek, hour=hourly['stop_hour'].astype('int64')).pivot_table(
+        index='weekday', columns='hour', values=measure, aggfunc='sum', fill_value=0)
+    matrix = matrix.reindex(index=range(7), columns=range(24), fill_value=0)
+    matrix.index = WEEKDAYS
+    return matrix
+
+# --- Canned query answered from the store (output matches the SQL in queries.py) ---
+
+def _stops_by_year_month_hour(store): # Advanced 3
+    hourly = store["hourly"]
+    result = hourly.assign(year=hourly['stop_date'].dt.year, month=hourly['stop_date'].dt.month).groupby(
+        ['year', 'month', 'stop_hour'], dropna=False, as_index=False)['stops'].sum()
+    result = result.sort_values(['year', 'month', 'stop_hour'], na_position='last')
+    hour = result['stop_hour'].astype('float64')
+    return pd.DataFrame({
+        'years_of_traffic_stops': result['year'],
+        'month_number_of_year': result['month'],
+        'month_of_year': result['month'].map(lambda m: calendar.month_name[int(m)].lower().ljust(9), na_action='ignore'), # to_char(date, 'month')
+        'hour_of_the_day': hour,
+        'hour_timestamp_of_the_day': pd.to_timedelta(hour, unit='h'), # date_trunc('hour', time) is an interval
+        'total_stops': result['stops'],
+    })
+
+# Map of canned SQL text to the function that answers it from the store
+timeseries_answers = {
+    list(advanced_query_map.values())[2]: _stops_by_year_month_hour,
+}
+
+# Answer a canned query from the store, or return None if it needs the full table
+def answer_from_timeseries(query, store):
+    answer = timeseries_answers.get(query)
+    if answer is None or store is None:
+        return None
+    return answer(store).reset_index(drop=True)
@@ -0,0 +1,202 @@
+# Per-vehicle stop history for repeat-offender lookups: a vehicle_history summary table kept current by
+# statement-level triggers on traffic_stops, so a lookup or a top-N list is an index read instead of a GROUP BY scan
+#
+# Usage:
+#   python vehicle_history.py TN01AB1234        # print one vehicle's summary and latest stops
+#   python vehicle_history.py --rebuild         # recount every vehicle from traffic_stops
+import argparse
+import sys
+import pandas as pd
+from sqlalchemy import create_engine, text
+from config import DB_URL
+from queries import medium_query_map
+
+RECENT_VIOLATIONS = 5 # Violations of the latest stops kept per vehicle
+TOP_VEHICLES = 10 # Rows in the top-N view
+RECENT_STOPS = 10 # Latest stops shown with a vehicle's summary
+
+# Counts kept per vehicle, each with a descending index for the top-N view
+VEHICLE_MEASURES = ['stops', 'arrests', 'searches', 'drug_stops']
+
+VEHICLE_HISTORY_TABLE_SQL = """create table if not exists vehicle_history (
+vehicle_number text primary key,
+stops integer not null,
+arrests integer not null,
+searches integer not null,
+drug_stops integer not null,
+first_seen timestamp, -- stop_date + stop_time of the earliest stop
+last_seen timestamp, -- and of the latest stop
+recent_violations text[] not null default '{}', -- Violations of the latest stops, newest first
+recent_seen timestamp[] not null default '{}' -- When each of those stops happened
+)"""
+
+# Vehicles are tracked by this key, so plates typed in another case or with spaces around them count as one vehicle.
+# Lookups normalize the same way (normalize_vehicle_number).
+VEHICLE_KEY = "upper(trim(vehicle_number))"
+
+# A vehicle's stops in date order by its key (recounts and the latest stops of a lookup)
+VEHICLE_KEY_INDEX = f"create index if not exists ix_traffic_stops_vehicle_key on traffic_stops (({VEHICLE_KEY}), stop_date, stop_time)"
+
+VEHICLE_HISTORY_INDEXES = [
+    f"create index if not exists ix_vehicle_history_{measure} on vehicle_history ({measure} desc, vehicle_number)"
+    for measure in VEHICLE_MEASURES
+]
+
+# Per-vehicle summary of a set of traffic_stops rows (the whole table, a transition table or a few vehicles)
+def vehicle_summary_sql(source, where="true"):
+    seen = "stop_date + stop_time"
+    return f"""select {VEHICLE_KEY}, count(*), count(*) filter (where is_arrested), count(*) filter (where search_conducted),
+count(*) filter (where drugs_related_stop), min({seen}), max({seen}),
+coalesce((array_agg(violation order by {seen} desc nulls last) filter (where violation is not null))[1:{RECENT_VIOLATIONS}], '{{}}'),
+coalesce((array_agg({seen} order by {seen} desc nulls last) filter (where violation is not null))[1:{RECENT_VIOLATIONS}], '{{}}')
+from {source}
+where vehicle_number is not null and {where}
+group by 1"""
+
+VEHICLE_HISTORY_COLUMNS = "vehicle_number, stops, arrests, searches, drug_stops, first_seen, last_seen, recent_violations, recent_seen"
+
+# Inserts are added to the counts; the recent lists are merged and cut back to RECENT_VIOLATIONS
+VEHICLE_HISTORY_INSERT_FUNCTION = f"""create or replace function vehicle_history_insert() returns trigger language plpgsql as $$
+begin
+    insert into vehicle_history as h ({VEHICLE_HISTORY_COLUMNS})
+    {vehicle_summary_sql("new_rows")}
+    on conflict (vehicle_number) do update set
+        stops = h.stops + excluded.stops,
+        arrests = h.arrests + excluded.arrests,
+        searches = h.searches + excluded.searches,
+        drug_stops = h.drug_stops + excluded.drug_stops,
+        first_seen = least(h.first_seen, excluded.first_seen),
+        last_seen = greatest(h.last_seen, excluded.last_seen),
+        (recent_violations, recent_seen) = (
+            select coalesce(array_agg(v order by t desc nulls last), '{{}}'), coalesce(array_agg(t order by t desc nulls last), '{{}}')
+            from (select v, t from unnest(h.recent_violations || excluded.recent_violations, h.recent_seen || excluded.recent_seen) as r(v, t)
+                  order by t desc nulls last limit {RECENT_VIOLATIONS}) as recent);
+    return null;
+end $$"""
+
+# Deleted or updated stops cannot be taken back out of min, max and the recent lists, so those vehicles are recounted
+# (an index read on the vehicle key index per vehicle)
+VEHICLE_HISTORY_RECOUNT_FUNCTION = f"""create or replace function vehicle_history_recount() returns trigger language plpgsql as $$
+declare
+    vehicles text[];
+begin
+    if tg_op = 'DELETE' then
+        vehicles := array(select distinct {VEHICLE_KEY} from old_rows where vehicle_number is not null);
+    else
+        vehicles := array(select {VEHICLE_KEY} from old_rows where vehicle_number is not null
+                          union select {VEHICLE_KEY} from new_rows where vehicle_number is not null);
+    end if;
+    delete from vehicle_history where vehicle_number = any(vehicles);
+    insert into vehicle_history ({VEHICLE_HISTORY_COLUMNS})
+    {vehicle_summary_sql("traffic_stops", f"{VEHICLE_KEY} = any(vehicles)")};
+    return null;
+end $$"""
+
+VEHICLE_HISTORY_TRUNCATE_FUNCTION = """create or replace function vehicle_history_truncate() returns trigger language plpgsql as $$
+begin
+    truncate vehicle_history;
+    return null;
+end $$"""
+
+# Statement-level triggers see each INSERT, COPY, UPDATE or DELETE as one transition table, so a bulk load
+# updates the summary with one aggregate per statement instead of one upsert per row
+VEHICLE_HISTORY_TRIGGERS = [
+    "drop trigger if exists vehicle_history_insert on traffic_stops",
+    "create trigger vehicle_history_insert after insert on traffic_stops referencing new table as new_rows "
+    "for each statement execute function vehicle_history_insert()",
+    "drop trigger if exists vehicle_history_update on traffic_stops",
+    "create trigger vehicle_history_update after update on traffic_stops referencing old table as old_rows new table as new_rows "
+    "for each statement execute function vehicle_history_recount()",
+    "drop trigger if exists vehicle_history_delete on traffic_stops",
+    "create trigger vehicle_history_delete after delete on traffic_stops referencing old table as old_rows "
+    "for each statement execute function vehicle_history_recount()",
+    "drop trigger if exists vehicle_history_truncate on traffic_stops",
+    "create trigger vehicle_history_truncate after truncate on traffic_stops for each statement execute function vehicle_history_truncate()",
+]
+
+# Recount every vehicle from traffic_stops (backfill when the table is created, or a manual repair). DELETE rather than
+# TRUNCATE: TRUNCATE takes an ACCESS EXCLUSIVE lock that would block lookups until the rebuild commits.
+VEHICLE_HISTORY_REBUILD = [
+    "delete from vehicle_history",
+    f"insert into vehicle_history ({VEHICLE_HISTORY_COLUMNS})\n{vehicle_summary_sql('traffic_stops')}",
+    "analyze vehicle_history",
+]
+
+# Statements for the vehicle_history migration: table, indexes, trigger functions, backfill, then the triggers
+VEHICLE_HISTORY_MIGRATION = ([VEHICLE_HISTORY_TABLE_SQL] + VEHICLE_HISTORY_INDEXES
+                             + [VEHICLE_HISTORY_INSERT_FUNCTION, VEHICLE_HISTORY_RECOUNT_FUNCTION, VEHICLE_HISTORY_TRUNCATE_FUNCTION]
+                             + VEHICLE_HISTORY_REBUILD + VEHICLE_HISTORY_TRIGGERS)
+
+# Statements for the vehicle key migration: key index, trigger functions that use the key, then a recount that merges
+# vehicles stored under differently cased plates
+VEHICLE_KEY_MIGRATION = ([VEHICLE_KEY_INDEX, VEHICLE_HISTORY_INSERT_FUNCTION, VEHICLE_HISTORY_RECOUNT_FUNCTION]
+                         + VEHICLE_HISTORY_REBUILD + ["analyze traffic_stops"])
+
+VEHICLE_HISTORY_EXISTS_SQL = "select cast(to_regclass('vehicle_history') is not null as int) as available" # 0 until migration 5 is applied
+
+# One vehicle's summary (primary key lookup)
+VEHICLE_LOOKUP_SQL = """select vehicle_number, stops, arrests, searches, drug_stops, first_seen, last_seen,
+array_to_string(recent_violations, ', ') as recent_violations -- Newest first
+from vehicle_history
+where vehicle_number = :vehicle"""
+
+# One vehicle's latest stops (read backwards from the vehicle key index)
+VEHICLE_STOPS_SQL = f"""select stop_date, stop_time, country_name, violation, stop_outcome, search_conducted, is_arrested, drugs_related_stop, stop_duration
+from traffic_stops
+where {VEHICLE_KEY} = :vehicle
+order by stop_date desc, stop_time desc
+limit {RECENT_STOPS}"""
+
+# Top vehicles by one measure, read from the measure's descending index
+def top_vehicles_query(measure, limit=TOP_VEHICLES):
+    if measure not in VEHICLE_MEASURES:
+        raise ValueError(f"Unknown vehicle measure: {measure}")
+    return f"""select vehicle_number, stops, arrests, searches, drug_stops, last_seen
+from vehicle_history
+where {measure} > 0
+order by {measure} desc, vehicle_number
+limit {int(limit)}"""
+
+def normalize_vehicle_number(vehicle_number): # Same spelling as VEHICLE_KEY and as logs written by the form
+    return (vehicle_number or "").strip().upper()
+
+# Medium queries 1 and 2 answered from vehicle_history (no GROUP BY over traffic_stops; vehicles without a number are not tracked,
+# and plates are counted by VEHICLE_KEY)
+vehicle_answers = {
+    list(medium_query_map.values())[0]: """select vehicle_number, drug_stops as drug_stops_count
+from vehicle_history where drug_stops > 0
+order by drug_stops desc, vehicle_number
+limit 10""",
+    list(medium_query_map.values())[1]: """select vehicle_number, searches as most_frequently_searched_count
+from vehicle_history where searches > 0
+order by searches desc, vehicle_number
+limit 10""",
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look up a vehicle's stop history or rebuild the vehicle_history table")
+    parser.add_argument("vehicle", nargs="?", help="Vehicle number to look up")
+    parser.add_argument("--rebuild", action="store_true", help="Recount every vehicle from traffic_stops")
+    args = parser.parse_args(argv)
+    if not args.vehicle and not args.rebuild:
+        parser.error("give a vehicle number or --rebuild")
+    engine = create_engine(DB_URL)
+    if args.rebuild:
+        with engine.begin() as conn: # Readers see the old summary until the rebuild commits (the rebuild deletes rather than truncates)
+            for statement in VEHICLE_HISTORY_REBUILD:
+                conn.execute(text(statement))
+            vehicles = conn.execute(text("select count(*) from vehicle_history")).scalar()
+        print(f"✅ Rebuilt vehicle_history: {vehicles:,} vehicles")
+    if args.vehicle:
+        vehicle = normalize_vehicle_number(args.vehicle)
+        with engine.connect() as conn:
+            summary = pd.read_sql(text(VEHICLE_LOOKUP_SQL), conn, params={"vehicle": vehicle})
+            stops = pd.read_sql(text(VEHICLE_STOPS_SQL), conn, params={"vehicle": vehicle})
+        if summary.empty:
+            print(f"No stops recorded for {vehicle}.")
+        else:
+            print(summary.T.to_string(header=False))
+            print(stops.to_string(index=False))
+
+if __name__ == "__main__":
+    sys.exit(main())